@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+""" End-to-end load test with simulated sensors on pseudo-terminals (Linux)
+
+Run from the repository root:
+    python benchmarks/bench_pty_farm.py --sensors 200 --interval 1 --duration 30
+Every port is opened with pyserial and read by SDS011, results are written as JSON.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import serial
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from pysds011.metrics import Metrics  # noqa: E402
+from pysds011.sds011 import SDS011  # noqa: E402
+from pysds011.simulation.pty_farm import PTYFarm  # noqa: E402
+
+
+def run_load_test(sensors: int, interval: float, duration: float, baud: int) -> dict:
+    """ Handshake with all sensors, then read data frames round robin for duration seconds """
+    farm = PTYFarm(sensors, interval=interval, baud=baud).start()
+    ports = []
+    try:
+        metrics = Metrics()
+        start = time.monotonic()
+        clients = []
+        for port in farm.ports:
+            connection = serial.Serial(port, baud, timeout=0)
+            ports.append(connection)
+            clients.append(SDS011(connection, metrics=metrics))
+        handshake_s = time.monotonic() - start
+
+        frames = 0
+        start = time.monotonic()
+        end = start + duration
+        while time.monotonic() < end:
+            for client in clients:
+                if client.serial.in_waiting or client.reader.parser.pending:
+                    try:
+                        client.read_and_decode_data(timeout=0.01)
+                        frames += 1
+                    except TimeoutError:
+                        pass
+        elapsed = time.monotonic() - start
+        latency = metrics.latency
+        handshakes = sum(histogram.count for histogram in latency.values())
+        stats = farm.stats().values()
+        return {'sensors': sensors,
+                'interval_s': interval,
+                'baud': baud,
+                'handshake_total_s': handshake_s,
+                'handshake_mean_s': (sum(histogram.sum for histogram in latency.values())
+                                     / handshakes if handshakes else None),
+                'frames_expected': sensors * elapsed / interval if interval else 0,
+                'frames_read': frames,
+                'frames_per_s': frames / elapsed,
+                'bytes_skipped': metrics.bytes_skipped,
+                'farm_dropped': sum(sensor['dropped'] for sensor in stats)}
+    finally:
+        for connection in ports:
+            connection.close()
+        farm.stop()
+
+
+def main() -> None:
+    """ Command line interface """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sensors', type=int, default=50, help='number of simulated sensors')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='seconds between data frames of one sensor')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to read')
+    parser.add_argument('--baud', type=int, default=9600, help='baud rate of the simulated line')
+    parser.add_argument('--output', help='write JSON results to file instead of stdout')
+    args = parser.parse_args()
+
+    results = json.dumps(run_load_test(args.sensors, args.interval, args.duration, args.baud),
+                         indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(results + '\n')
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+""" Benchmarks for parsing, validation, command round trips and simulation
+
+Run from the repository root:
+    python benchmarks/bench_sds011.py --output bench_output.txt
+    python benchmarks/bench_sds011.py --compare old.json new.json
+Results are written as JSON.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from pysds011.sds011 import SDS011  # noqa: E402
+from pysds011.definitions import WorkingMode, ReportMode  # noqa: E402
+from pysds011.parser import FrameParser  # noqa: E402
+from pysds011.simulation.sim_faults import FaultInjector  # noqa: E402
+from pysds011.simulation.sim_sds011 import SimulationSDS011  # noqa: E402
+
+VALID_REPLY = b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab'
+
+
+def measure(function: Callable[[], None], operations: int, repeat: int) -> Dict[str, float]:
+    """ Run function repeat times, each call performs operations operations """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {'operations': operations,
+            'best_s': best,
+            'ops_per_s': operations / best if best else float('inf'),
+            'ns_per_op': best / operations * 1e9}
+
+
+def bench_read_and_decode(frames: int, repeat: int) -> Dict[str, float]:
+    """ Frames per second of SDS011.read_and_decode_data on sample data """
+    simulation = SimulationSDS011()
+    sensor = SDS011(simulation)
+    simulation.read_sample_data_sds011()
+
+    def run():
+        for _ in range(frames):
+            sensor.read_and_decode_data()
+    result = measure(run, frames, repeat)
+    simulation.close()
+    return result
+
+
+def bench_commands(rounds: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """ Round trip latency of every command method """
+    simulation = SimulationSDS011()
+    sensor = SDS011(simulation)
+    commands = {
+        'set_report_mode': lambda: sensor.set_report_mode(ReportMode.REPORT_QUERY_MODE),
+        'get_report_mode': sensor.get_report_mode,
+        'query_data': sensor.query_data,
+        'set_device_id': lambda: sensor.set_device_id([10, 11], device_id=[10, 11]),
+        'set_working_mode': lambda: sensor.set_working_mode(WorkingMode.WORK_MODE),
+        'get_working_mode': sensor.get_working_mode,
+        'get_firmware_version': sensor.get_firmware_version,
+        'set_working_period': lambda: sensor.set_working_period(0),
+        'get_working_period': sensor.get_working_period,
+    }
+    results = {}
+    for name, command in commands.items():
+        def run(command=command):
+            for _ in range(rounds):
+                command()
+        results[name] = measure(run, rounds, repeat)
+    return results
+
+
+def bench_validation(rounds: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """ Cost of reply and command validation """
+    simulation = SimulationSDS011()
+    sensor = SDS011(simulation)
+    sensor.last_reply = VALID_REPLY
+    command = sensor.last_command
+
+    def reply_valid():
+        for _ in range(rounds):
+            sensor.reply_message_valid()
+
+    def command_valid():
+        for _ in range(rounds):
+            SDS011.command_valid(command)
+
+    stream = VALID_REPLY * rounds
+
+    def parser_frames():
+        parser = FrameParser()
+        for _ in parser.parse(stream):
+            pass
+
+    return {'reply_message_valid': measure(reply_valid, rounds, repeat),
+            'command_valid': measure(command_valid, rounds, repeat),
+            'frame_parser': measure(parser_frames, rounds, repeat)}
+
+
+def bench_simulation_read(total_bytes: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """ Throughput of SimulationSDS011.read() in bytes per second """
+    simulation = SimulationSDS011()
+    simulation.read_sample_data_sds011()
+    results = {}
+    for size in (1, 10, 4096):
+        calls = max(total_bytes // size, 1)
+
+        def run(size=size, calls=calls):
+            for _ in range(calls):
+                simulation.read(size)
+        results['read_%d' % size] = measure(run, calls * size, repeat)
+    simulation.close()
+    return results
+
+
+def bench_faulty_read(frames: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """ Frames per second of read_and_decode_data on sample data with byte faults """
+    results = {}
+    for rate in (0.0001, 0.001, 0.01):
+        simulation = SimulationSDS011()
+        sensor = SDS011(simulation)
+        simulation.read_sample_data_sds011()
+        # equal shares of bit flips, drops, duplicates and garbage bursts
+        simulation.use_faults(FaultInjector(seed=1, bit_flip_rate=rate / 4, drop_rate=rate / 4,
+                                            duplicate_rate=rate / 4, garbage_rate=rate / 4))
+
+        def run():
+            for _ in range(frames):
+                sensor.read_and_decode_data()
+        results['fault_rate_%g' % rate] = measure(run, frames, repeat)
+        simulation.close()
+    return results
+
+
+def git_revision() -> str:
+    """ Return current git commit or empty string """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_benchmarks(scale: float = 1.0, repeat: int = 5) -> dict:
+    """ Run all benchmarks and return results """
+    return {
+        'meta': {'revision': git_revision(),
+                 'python': platform.python_version(),
+                 'platform': platform.platform(),
+                 'time': time.time(),
+                 'scale': scale,
+                 'repeat': repeat},
+        'read_and_decode_data': bench_read_and_decode(int(20000 * scale), repeat),
+        'commands': bench_commands(int(2000 * scale), repeat),
+        'validation': bench_validation(int(50000 * scale), repeat),
+        'simulation_read': bench_simulation_read(int(1000000 * scale), repeat),
+        'faulty_read': bench_faulty_read(int(10000 * scale), repeat),
+    }
+
+
+def flatten(results: dict, prefix: str = '') -> Dict[str, float]:
+    """ Return ns_per_op of all benchmarks by dotted name """
+    flat = {}
+    for key, value in results.items():
+        if key == 'meta' or not isinstance(value, dict):
+            continue
+        if 'ns_per_op' in value:
+            flat[prefix + key] = value['ns_per_op']
+        else:
+            flat.update(flatten(value, prefix + key + '.'))
+    return flat
+
+
+def compare(old: dict, new: dict) -> None:
+    """ Print relative change of ns_per_op between two result files """
+    old_flat = flatten(old)
+    new_flat = flatten(new)
+    for name in sorted(new_flat):
+        if name in old_flat:
+            change = (new_flat[name] / old_flat[name] - 1) * 100
+            print('%-45s %12.1f ns %12.1f ns %+8.1f %%' % (
+                name, old_flat[name], new_flat[name], change))
+
+
+def main() -> None:
+    """ Command line interface """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='scale number of operations')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions, best is reported')
+    parser.add_argument('--output', help='write JSON results to file instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two JSON result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            compare(json.load(old), json.load(new))
+        return
+
+    results = json.dumps(run_benchmarks(args.scale, args.repeat), indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(results + '\n')
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
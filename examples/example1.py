@@ -9,7 +9,7 @@ from pysds011.sds011 import SDS011
 def run() -> None:
     """Simple example to read, decode and print data from SDS011 sensor."""
     try:
-        ser = serial.Serial('COM4', 9600)
+        ser = serial.Serial('COM4', 9600, timeout=0.1)
         ser.flushInput()
         sensor = SDS011(ser)
         print('Connected to SDS011 with id: ' + sensor.get_device_id())
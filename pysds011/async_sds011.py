@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+""" asyncio control for the SDS011 sensor. """
+
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional
+from .definitions import WorkingMode
+from .definitions import ReportMode
+from .definitions import Modifier
+from .definitions import Command
+from . import codec
+from .measurement import Measurement
+from .parser import FrameParser, REPLY_LENGTH
+from .sds011 import SDS011
+
+
+class AsyncSDS011:
+    """ asyncio counterpart of SDS011.
+
+    Works on an asyncio StreamReader/StreamWriter pair or any objects with
+    the same API (async read(n), write(data), async drain()).
+    Use the create() coroutine to get an initialised instance. timeout is
+    the default time in seconds commands wait for their reply.
+    """
+    def __init__(self, reader, writer, timeout: float = 3.0):
+        """ Initialisation without handshake """
+        self.reader = reader
+        self.writer = writer
+        self.parser = FrameParser()
+        self.firmware = None
+        self.device_id = None
+        self.data = {'PM2.5': 0.0, 'PM10': 0.0}
+        self.measurement: Optional[Measurement] = None
+        self.last_command = b''
+        self.last_reply = b''
+        self.last_reply_time = 0.0
+        self.timeout = timeout
+
+    @classmethod
+    async def create(cls, reader, writer, timeout: float = 3.0) -> 'AsyncSDS011':
+        """ Create instance and read firmware version and device id """
+        sensor = cls(reader, writer, timeout)
+        await sensor.get_firmware_version()
+        return sensor
+
+    async def read_message(self) -> None:
+        """ Read next valid message from stream """
+        parser = self.parser
+        frame = parser.next_frame()
+        while frame is None:
+            chunk = await self.reader.read(max(REPLY_LENGTH - parser.pending, 1024))
+            if not chunk:
+                raise EOFError('Stream closed!')
+            parser.feed(chunk)
+            frame = parser.next_frame()
+        self.last_reply = bytes(frame)
+        self.last_reply_time = time.monotonic()
+
+    def decode_data(self) -> Measurement:
+        """ Decode measured data from last reply """
+        measurement = Measurement.from_frame(self.last_reply, self.last_reply_time)
+        self.measurement = measurement
+        self.data['PM2.5'] = measurement.pm25_raw/10
+        self.data['PM10'] = measurement.pm10_raw/10
+        return measurement
+
+    async def read_and_decode_data(self) -> Measurement:
+        """ Read and decode data from device """
+        await self.read_message()
+        return self.decode_data()
+
+    async def records(self) -> AsyncIterator[Measurement]:
+        """ Yield a Measurement for every received data frame """
+        while True:
+            await self.read_message()
+            if self.last_reply[1] == codec.DATA:
+                yield self.decode_data()
+
+    async def measurements(self) -> AsyncIterator[Dict[str, float]]:
+        """ Yield a copy of the measured data for every received frame """
+        while True:
+            await self.read_and_decode_data()
+            yield dict(self.data)
+
+    def __aiter__(self):
+        return self.measurements()
+
+    def get_device_id(self) -> str:
+        """ Return device id as hex string """
+        return str(bytes(self.device_id).hex()).upper()
+
+    async def __wait_reply(self) -> None:
+        """ Read messages until reply for the last command is received """
+        await self.read_message()
+        while not SDS011.is_reply_for(self.last_command, self.last_reply):
+            await self.read_message()
+
+    async def __command(self, command: Command, data: List[int],
+                        device_id: List[int] = None, timeout: float = None) -> None:
+        """ Send command to device and wait for reply at most timeout seconds """
+        self.last_command = SDS011.command_frame(command, data, device_id)
+        if not self.last_command:
+            return
+        self.parser.reset()
+        self.writer.write(self.last_command)
+        await self.writer.drain()
+        try:
+            await asyncio.wait_for(self.__wait_reply(),
+                                   self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError('No reply received from sensor!') from None
+
+    def __decode_device_id(self) -> None:
+        """ Decode device id from reply message """
+        self.device_id = [self.last_reply[6], self.last_reply[7]]
+
+    async def set_report_mode(self, report_mode: ReportMode,
+                              device_id: List[int] = None, timeout: float = None) -> None:
+        """ Set report mode """
+        await self.__command(Command.REPORT_MODE,
+                             [Modifier.SET.value, report_mode.value], device_id, timeout)
+
+    async def get_report_mode(self, device_id: List[int] = None, timeout: float = None) -> None:
+        """ Get report mode """
+        await self.__command(Command.REPORT_MODE, [Modifier.GET.value], device_id, timeout)
+
+    async def query_data(self, device_id: List[int] = None, timeout: float = None) -> None:
+        """ Query data from device and decode it """
+        await self.__command(Command.QUERY_DATA, [0], device_id, timeout)
+        self.decode_data()
+
+    async def set_device_id(self, new_device_id: List[int],
+                            device_id: List[int] = None, timeout: float = None) -> None:
+        """ Set device id """
+        await self.__command(Command.SET_DEVICE_ID, [0]*10 + new_device_id, device_id, timeout)
+        self.__decode_device_id()
+
+    async def set_working_mode(self, working_mode: WorkingMode,
+                               device_id: List[int] = None, timeout: float = None) -> None:
+        """ Set working mode """
+        await self.__command(Command.WORKING_MODE,
+                             [Modifier.SET.value, working_mode.value], device_id, timeout)
+
+    async def get_working_mode(self, device_id: List[int] = None, timeout: float = None) -> None:
+        """ Get working mode """
+        await self.__command(Command.WORKING_MODE, [Modifier.GET.value], device_id, timeout)
+
+    async def get_firmware_version(self, device_id: List[int] = None, timeout: float = None) -> None:
+        """ Get firmware version and decode firmware and device id """
+        await self.__command(Command.GET_FIRMWARE, [0], device_id, timeout)
+        self.firmware = {'year': self.last_reply[3],
+                         'month': self.last_reply[4],
+                         'day': self.last_reply[5]}
+        self.__decode_device_id()
+
+    async def set_working_period(self, working_period: int = 0,
+                                 device_id: List[int] = None, timeout: float = None) -> None:
+        """ Set working period """
+        assert 0 <= working_period <= 30
+        await self.__command(Command.WORKING_PERIOD,
+                             [Modifier.SET.value, working_period], device_id, timeout)
+
+    async def get_working_period(self, device_id: List[int] = None, timeout: float = None) -> None:
+        """ Get working period """
+        await self.__command(Command.WORKING_PERIOD, [Modifier.GET.value], device_id, timeout)
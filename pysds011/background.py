@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+""" Background thread reading the SDS011 serial stream """
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+from .codec import DATA
+from .parser import FrameParser
+from .reader import FrameReader
+
+
+class BackgroundReader:
+    """ Reads the serial interface in a thread and demultiplexes frames.
+
+    DATA frames go to a bounded measurement queue (the oldest frame is
+    dropped when full), COMMAND_REPLY frames to a reply queue. It offers
+    the FrameReader methods used by SDS011: read_frame() returns the next
+    DATA frame, read_reply() the next COMMAND_REPLY frame, so commands
+    can be sent while measurements keep being collected.
+    """
+
+    def __init__(self, serial, max_measurements: int = 1024, max_replies: int = 16,
+                 poll_interval: float = 0.1):
+        self.frame_reader = FrameReader(serial)
+        self.poll_interval = poll_interval
+        self.measurements: Deque[bytes] = deque(maxlen=max_measurements)
+        self.replies: Deque[bytes] = deque(maxlen=max_replies)
+        self.dropped_measurements = 0
+        self.error: Optional[BaseException] = None
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='SDS011BackgroundReader',
+                                       daemon=True)
+
+    @property
+    def parser(self) -> FrameParser:
+        """ Parser of the underlying FrameReader """
+        return self.frame_reader.parser
+
+    def start(self) -> 'BackgroundReader':
+        """ Start reading thread """
+        self.thread.start()
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        """ Stop reading thread """
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+        with self.condition:
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        """ Read and route frames until stopped """
+        while not self.stop_event.is_set():
+            try:
+                frame = self.frame_reader.read_frame(time.monotonic() + self.poll_interval)
+            except TimeoutError:
+                continue
+            except Exception as error:
+                with self.condition:
+                    self.error = error
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                if frame[1] == DATA:
+                    if len(self.measurements) == self.measurements.maxlen:
+                        self.dropped_measurements += 1
+                    self.measurements.append(frame)
+                else:
+                    self.replies.append(frame)
+                self.condition.notify_all()
+
+    def reset(self) -> None:
+        """ Drop stale command replies, measurements are kept """
+        with self.condition:
+            self.replies.clear()
+
+    def __pop(self, queue: Deque[bytes], deadline: Optional[float]) -> bytes:
+        """ Return oldest frame of queue, wait until deadline if empty """
+        with self.condition:
+            while not queue:
+                if self.error is not None:
+                    raise self.error
+                if self.stop_event.is_set():
+                    raise EOFError('Background reader stopped!')
+                if deadline is None:
+                    self.condition.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError('No frame received from sensor!')
+                    self.condition.wait(remaining)
+            return queue.popleft()
+
+    def read_frame(self, deadline: float = None) -> bytes:
+        """ Return next DATA frame """
+        return self.__pop(self.measurements, deadline)
+
+    def read_reply(self, deadline: float = None) -> bytes:
+        """ Return next COMMAND_REPLY frame """
+        return self.__pop(self.replies, deadline)
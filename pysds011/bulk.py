@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+""" Vectorized decoder for captured SDS011 byte streams (requires numpy) """
+
+import mmap
+from pathlib import Path
+from typing import NamedTuple, Union
+import numpy as np
+from .codec import REPLY_LENGTH, HEADER, TAIL, DATA
+
+
+class BulkData(NamedTuple):
+    """ Decoded measurements of a capture """
+    pm25: np.ndarray
+    pm10: np.ndarray
+    device_id: np.ndarray
+    offset: np.ndarray
+
+
+def _drop_overlapping(offsets: np.ndarray) -> np.ndarray:
+    """ Keep frames like a sequential reader would (first frame wins) """
+    if len(offsets) < 2 or np.all(np.diff(offsets) >= REPLY_LENGTH):
+        return offsets
+    keep = []
+    next_free = -1
+    for offset in offsets.tolist():
+        if offset >= next_free:
+            keep.append(offset)
+            next_free = offset + REPLY_LENGTH
+    return np.array(keep, dtype=offsets.dtype)
+
+
+def find_frames(buffer: Union[bytes, bytearray, memoryview, mmap.mmap]) -> np.ndarray:
+    """ Return byte offsets of all valid DATA frames in buffer """
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    candidates = len(raw) - REPLY_LENGTH + 1
+    if candidates <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    mask = raw[:candidates] == HEADER
+    mask &= raw[1:candidates + 1] == DATA
+    mask &= raw[REPLY_LENGTH - 1:] == TAIL
+    offsets = np.flatnonzero(mask)
+
+    # checksum over bytes 2..7 of every candidate
+    payload = raw[offsets[:, None] + np.arange(2, 8)].astype(np.uint16)
+    checksum = payload.sum(axis=1) % 256
+    offsets = offsets[checksum == raw[offsets + 8]]
+    return _drop_overlapping(offsets)
+
+
+def decode_buffer(buffer: Union[bytes, bytearray, memoryview, mmap.mmap]) -> BulkData:
+    """ Find and decode all valid DATA frames in buffer """
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    offsets = find_frames(buffer)
+    frames = raw[offsets[:, None] + np.arange(REPLY_LENGTH)].astype(np.uint16)
+    pm25 = ((frames[:, 3] << 8) + frames[:, 2]) / 10
+    pm10 = ((frames[:, 5] << 8) + frames[:, 4]) / 10
+    device_id = (frames[:, 6] << 8) + frames[:, 7]
+    return BulkData(pm25=pm25, pm10=pm10, device_id=device_id, offset=offsets)
+
+
+def decode_file(path: Union[str, Path]) -> BulkData:
+    """ Memory map capture file and decode all valid DATA frames """
+    with open(path, 'rb') as file:
+        if Path(path).stat().st_size == 0:
+            return decode_buffer(b'')
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            result = decode_buffer(data)
+    return result
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+""" Polling of several SDS011 sensors sharing one serial line """
+
+import time
+from typing import Dict, List, Optional, Tuple
+from .definitions import Command
+from .codec import DATA
+from .measurement import Measurement
+from .reader import FrameReader
+from .sds011 import SDS011
+
+
+class DeviceState:
+    """ State of one sensor on the bus """
+
+    def __init__(self, device_id: List[int]):
+        self.device_id = list(device_id)
+        self.query_command = SDS011.command_frame(Command.QUERY_DATA, [0], self.device_id)
+        self.data = {'PM2.5': 0.0, 'PM10': 0.0}
+        self.measurement: Optional[Measurement] = None
+        self.last_reply = b''
+        self.received = 0
+        self.missed = 0
+
+    def get_device_id(self) -> str:
+        """ Return device id as hex string """
+        return str(bytes(self.device_id).hex()).upper()
+
+    def decode_data(self, reply: bytes) -> None:
+        """ Decode measured data from reply """
+        self.last_reply = reply
+        self.measurement = Measurement.from_frame(reply)
+        self.data['PM2.5'] = self.measurement.pm25_raw/10
+        self.data['PM10'] = self.measurement.pm10_raw/10
+        self.received += 1
+
+
+class SDS011Bus:
+    """ Query several sensors on one serial line by device id.
+
+    Replies are routed to their sensor by the device id in bytes 6 and 7.
+    window is the number of queries sent before waiting for replies: 1 lets
+    only one sensor talk at a time, larger values pipeline the queries if
+    the line can carry overlapping replies. A sensor that does not answer
+    within timeout seconds is counted as missed.
+    """
+
+    def __init__(self, serial, device_ids: List[List[int]], window: int = 1,
+                 timeout: float = 1.0):
+        assert window >= 1
+        self.serial = serial
+        self.reader = FrameReader(serial)
+        self.window = window
+        self.timeout = timeout
+        self.unrouted_frames = 0
+        self.devices: Dict[Tuple[int, int], DeviceState] = {}
+        for device_id in device_ids:
+            self.add_device(device_id)
+
+    def add_device(self, device_id: List[int]) -> DeviceState:
+        """ Add sensor to the polling order """
+        state = DeviceState(device_id)
+        self.devices[tuple(device_id)] = state
+        return state
+
+    def device(self, device_id: List[int]) -> Optional[DeviceState]:
+        """ Return state of sensor """
+        return self.devices.get(tuple(device_id))
+
+    def __route(self, reply: bytes, outstanding: Dict[Tuple[int, int], DeviceState]) -> bool:
+        """ Pass DATA reply to the waiting sensor """
+        state = None
+        if reply[1] == DATA:
+            state = outstanding.pop((reply[6], reply[7]), None)
+        if state is None:
+            self.unrouted_frames += 1
+            return False
+        state.decode_data(reply)
+        return True
+
+    def poll(self, order: List[List[int]] = None) -> Dict[str, Dict[str, float]]:
+        """ Query all sensors (or the given order) once and return data by device id """
+        if order is None:
+            planned = list(self.devices.values())
+        else:
+            planned = [self.devices[tuple(device_id)] for device_id in order]
+        planned.reverse()
+        outstanding: Dict[Tuple[int, int], DeviceState] = {}
+        polled = []
+        self.reader.reset()
+        while planned or outstanding:
+            commands = b''
+            while planned and len(outstanding) < self.window:
+                state = planned.pop()
+                outstanding[tuple(state.device_id)] = state
+                polled.append(state)
+                commands += state.query_command
+            if commands:
+                self.serial.write(commands)
+
+            deadline = time.monotonic() + self.timeout
+            try:
+                while not self.__route(self.reader.read_frame(deadline), outstanding):
+                    pass
+            except TimeoutError:
+                for state in outstanding.values():
+                    state.missed += 1
+                outstanding.clear()
+        return {state.get_device_id(): dict(state.data) for state in polled}
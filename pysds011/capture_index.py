@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+""" Frame offset index for raw capture files
+
+The sidecar file (capture path + '.idx') holds the byte offset of every
+Nth valid frame and, if available, its capture time. Frames are counted
+like FrameParser finds them, so seeking to an indexed offset and parsing
+from there gives the same frames as parsing from the start.
+"""
+
+import bisect
+import math
+import struct
+from array import array
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple, Union
+from .parser import FrameParser, REPLY_LENGTH
+
+INDEX_MAGIC = b'SDSI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sBIQQ')
+CHUNK_SIZE = 1 << 16
+
+
+def fixed_interval(start_time: float, interval: float = 1.0) -> Callable[[int, int], float]:
+    """ Timestamp function for captures with one frame every interval seconds """
+    def timestamp(frame_number: int, offset: int) -> float:
+        return start_time + frame_number * interval
+    return timestamp
+
+
+class CaptureIndex:
+    """ Offsets (and optional timestamps) of every Nth frame of a capture """
+
+    def __init__(self, capture_path: Union[str, Path], every: int):
+        assert every > 0
+        self.capture_path = Path(capture_path)
+        self.every = every
+        self.frames = 0
+        self.offsets = array('Q')
+        self.timestamps = array('d')
+
+    @staticmethod
+    def index_path(capture_path: Union[str, Path]) -> Path:
+        """ Return sidecar path of capture """
+        return Path(str(capture_path) + '.idx')
+
+    @classmethod
+    def build(cls, capture_path: Union[str, Path], every: int = 1000,
+              timestamp: Callable[[int, int], Optional[float]] = None) -> 'CaptureIndex':
+        """ Parse capture once and record every Nth frame.
+
+        timestamp(frame_number, offset) returns the capture time of a frame
+        or None, see fixed_interval().
+        """
+        index = cls(capture_path, every)
+        parser = FrameParser(CHUNK_SIZE + REPLY_LENGTH)
+        frame_number = 0
+        with open(capture_path, 'rb') as file:
+            chunk = file.read(CHUNK_SIZE)
+            while chunk:
+                for _ in parser.parse(chunk):
+                    if frame_number % every == 0:
+                        offset = parser.stream_offset - REPLY_LENGTH
+                        index.offsets.append(offset)
+                        time = timestamp(frame_number, offset) if timestamp else None
+                        index.timestamps.append(math.nan if time is None else time)
+                    frame_number += 1
+                chunk = file.read(CHUNK_SIZE)
+        index.frames = frame_number
+        return index
+
+    def save(self, path: Union[str, Path] = None) -> Path:
+        """ Write index to sidecar file """
+        if path is None:
+            path = CaptureIndex.index_path(self.capture_path)
+        with open(path, 'wb') as file:
+            file.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, self.every,
+                                         self.frames, len(self.offsets)))
+            self.offsets.tofile(file)
+            self.timestamps.tofile(file)
+        return Path(path)
+
+    @classmethod
+    def load(cls, capture_path: Union[str, Path],
+             path: Union[str, Path] = None) -> 'CaptureIndex':
+        """ Read index of capture from sidecar file """
+        if path is None:
+            path = CaptureIndex.index_path(capture_path)
+        with open(path, 'rb') as file:
+            magic, version, every, frames, entries = INDEX_HEADER.unpack(
+                file.read(INDEX_HEADER.size))
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise ValueError('Not a capture index!')
+            index = cls(capture_path, every)
+            index.frames = frames
+            index.offsets.fromfile(file, entries)
+            index.timestamps.fromfile(file, entries)
+        return index
+
+    @property
+    def has_timestamps(self) -> bool:
+        """ True if capture times are known """
+        return len(self.timestamps) > 0 and not math.isnan(self.timestamps[0])
+
+    def locate(self, frame_number: int) -> Tuple[int, int]:
+        """ Return (byte offset of nearest indexed frame, frames to skip from there) """
+        if not 0 <= frame_number < self.frames:
+            raise IndexError('Frame number out of range!')
+        entry = frame_number // self.every
+        return self.offsets[entry], frame_number - entry * self.every
+
+    def frame_number_at(self, time: float) -> int:
+        """ Return number of the first frame captured at or after time.
+
+        Capture times between indexed frames are interpolated linearly.
+        """
+        if not self.has_timestamps:
+            raise ValueError('Index has no timestamps!')
+        timestamps = self.timestamps
+        entry = bisect.bisect_left(timestamps, time)
+        if entry == 0:
+            return 0
+        if entry < len(timestamps):
+            lower = entry - 1
+        elif len(timestamps) >= 2:
+            # after the last indexed frame, extrapolate with the last interval
+            lower = entry - 2
+        else:
+            return self.frames
+        start, end = timestamps[lower], timestamps[lower + 1]
+        if end <= start:
+            return min((lower + 1) * self.every, self.frames)
+        number = lower * self.every + math.ceil((time - start) / (end - start) * self.every)
+        return min(number, self.frames)
+
+    def frames_from(self, frame_number: int, count: int = None) -> Iterator[bytes]:
+        """ Yield up to count frames starting with frame_number """
+        offset, skip = self.locate(frame_number)
+        parser = FrameParser(CHUNK_SIZE + REPLY_LENGTH)
+        with open(self.capture_path, 'rb') as file:
+            file.seek(offset)
+            chunk = file.read(CHUNK_SIZE)
+            while chunk:
+                for frame in parser.parse(chunk):
+                    if skip:
+                        skip -= 1
+                        continue
+                    if count is not None:
+                        if count <= 0:
+                            return
+                        count -= 1
+                    yield bytes(frame)
+                chunk = file.read(CHUNK_SIZE)
+
+    def frames_between(self, start: float, end: float) -> Iterator[bytes]:
+        """ Yield frames captured in [start, end) """
+        first = self.frame_number_at(start)
+        if first >= self.frames:
+            return
+        last = self.frame_number_at(end)
+        yield from self.frames_from(first, max(0, last - first))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+""" Packing, unpacking and validation of SDS011 frames
+
+Plain integer constants and precompiled struct layouts for the fixed
+10 byte reply and 19 byte command frames, so the hot paths need no Enum
+attribute lookups and build no intermediate lists.
+"""
+
+import struct
+from typing import Sequence, Tuple
+
+HEADER = 0xAA
+TAIL = 0xAB
+COMMAND = 0xB4
+COMMAND_REPLY = 0xC5
+DATA = 0xC0
+
+REPLY_LENGTH = 10
+COMMAND_LENGTH = 19
+COMMAND_DATA_LENGTH = 12
+BROADCAST_ID = b'\xff\xff'
+
+# header, type, 6 payload bytes, checksum, tail
+REPLY = struct.Struct('<BB6sBB')
+# header, type, PM2.5, PM10, device id, checksum, tail
+DATA_REPLY = struct.Struct('<BBHH2sBB')
+# header, type, command, 12 data bytes, device id, checksum, tail
+COMMAND_FRAME = struct.Struct('<BBB12s2sBB')
+PM_VALUES = struct.Struct('<2xHH')
+
+
+def checksum(payload) -> int:
+    """ Sum of payload bytes modulo 256 """
+    return sum(payload) % 256
+
+
+def reply_valid(frame) -> bool:
+    """ Validate 10 byte reply or data frame """
+    if len(frame) != REPLY_LENGTH:
+        return False
+    header, message_type, payload, check, tail = REPLY.unpack(frame)
+    return (header == HEADER and tail == TAIL and
+            (message_type == DATA or message_type == COMMAND_REPLY) and
+            sum(payload) % 256 == check)
+
+
+def command_valid(frame) -> bool:
+    """ Validate 19 byte command frame """
+    if len(frame) != COMMAND_LENGTH:
+        return False
+    header, message_type, command, data, device_id, check, tail = COMMAND_FRAME.unpack(frame)
+    return (header == HEADER and message_type == COMMAND and tail == TAIL and
+            (command + sum(data) + sum(device_id)) % 256 == check)
+
+
+def pack_command(command: int, data: Sequence[int] = (),
+                 device_id: Sequence[int] = None) -> bytes:
+    """ Build command frame, data is padded to 12 bytes """
+    assert len(data) <= COMMAND_DATA_LENGTH
+    data = bytes(data)
+    device_id = bytes(device_id) if device_id else BROADCAST_ID
+    return COMMAND_FRAME.pack(HEADER, COMMAND, command, data, device_id,
+                              (command + sum(data) + sum(device_id)) % 256, TAIL)
+
+
+def unpack_command(frame) -> Tuple[int, bytes, bytes]:
+    """ Return command, 12 data bytes and device id of a command frame """
+    return COMMAND_FRAME.unpack(frame)[2:5]
+
+
+def pack_reply(message_type: int, payload: Sequence[int]) -> bytes:
+    """ Build reply frame from 6 payload bytes (including device id) """
+    payload = bytes(payload)
+    assert len(payload) == 6
+    return REPLY.pack(HEADER, message_type, payload, sum(payload) % 256, TAIL)
+
+
+def pack_data(pm25: int, pm10: int, device_id: Sequence[int]) -> bytes:
+    """ Build data frame from raw PM values (tenths of µg/m³) """
+    device_id = bytes(device_id)
+    return DATA_REPLY.pack(HEADER, DATA, pm25, pm10, device_id,
+                           ((pm25 & 0xFF) + (pm25 >> 8) + (pm10 & 0xFF) + (pm10 >> 8) +
+                            sum(device_id)) % 256, TAIL)
+
+
+def unpack_pm(frame) -> Tuple[int, int]:
+    """ Return raw PM2.5 and PM10 values (tenths of µg/m³) of a data frame """
+    return PM_VALUES.unpack_from(frame)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+""" Collect data of many serial ports in worker processes """
+
+import multiprocessing
+import struct
+import time
+from typing import Callable, Dict, List, NamedTuple, Tuple
+from . import codec
+from .metrics import Metrics
+from .sds011 import SDS011
+
+# sequence, timestamp, PM2.5, PM10, device id, frames read, timeouts,
+# bytes skipped, invalid frames
+SLOT = struct.Struct('<QdHH2sQQQQ6x')
+
+
+class Reading(NamedTuple):
+    """ Latest reading and counters of one port """
+    port: str
+    timestamp: float
+    pm25: float
+    pm10: float
+    device_id: str
+    frames_read: int
+    timeouts: int
+    bytes_skipped: int
+    invalid_frames: int
+
+
+def open_serial_port(port: str):
+    """ Open port without read timeout, the reader sleeps on empty reads """
+    import serial
+    return serial.Serial(port, 9600, timeout=0)
+
+
+class SharedReadings:
+    """ Fixed size slots in a shared memory array, one per port.
+
+    Every slot is written by one process only. A sequence number that is
+    odd while the slot is written lets readers retry torn reads.
+    """
+
+    def __init__(self, slots: int, context=None):
+        if context is None:
+            context = multiprocessing.get_context()
+        self.slots = slots
+        self.array = context.RawArray('B', SLOT.size * slots)
+        self.view = None
+
+    def __getstate__(self):
+        return {'slots': self.slots, 'array': self.array}
+
+    def __setstate__(self, state):
+        self.slots = state['slots']
+        self.array = state['array']
+        self.view = None
+
+    def __buffer(self) -> memoryview:
+        """ Byte view of the shared array """
+        if self.view is None:
+            self.view = memoryview(self.array).cast('B')
+        return self.view
+
+    def write(self, slot: int, metrics: Metrics, timestamp: float = None,
+              reply: bytes = None) -> None:
+        """ Publish counters and, if given, the last frame of a sensor """
+        view = self.__buffer()
+        offset = slot * SLOT.size
+        values = SLOT.unpack_from(view, offset)
+        sequence = values[0] + 1
+        struct.pack_into('<Q', view, offset, sequence)
+        if reply is None:
+            timestamp, pm25, pm10, device_id = values[1:5]
+        else:
+            pm25, pm10 = codec.unpack_pm(reply)
+            device_id = bytes(reply[6:8])
+        SLOT.pack_into(view, offset, sequence + 1, timestamp, pm25, pm10, device_id,
+                       metrics.frames_read, metrics.timeouts, metrics.bytes_skipped,
+                       metrics.invalid_frames)
+
+    def read(self, slot: int, port: str = '') -> Reading:
+        """ Return consistent copy of a slot """
+        view = self.__buffer()
+        offset = slot * SLOT.size
+        while True:
+            values = SLOT.unpack_from(view, offset)
+            if values[0] % 2 == 0 and struct.unpack_from('<Q', view, offset)[0] == values[0]:
+                break
+            time.sleep(0)
+        _, timestamp, pm25, pm10, device_id, frames, timeouts, skipped, invalid = values
+        return Reading(port, timestamp, pm25/10, pm10/10, device_id.hex().upper(),
+                       frames, timeouts, skipped, invalid)
+
+
+def collect(assignments: List[Tuple[int, str]], readings: SharedReadings,
+            open_port: Callable[[str], object], stop_event, poll_timeout: float) -> None:
+    """ Worker: read all assigned ports in turn and publish every frame """
+    sensors = []
+    try:
+        for slot, port in assignments:
+            sensor = SDS011(open_port(port), metrics=Metrics(), lazy=True)
+            sensors.append((slot, sensor))
+            readings.write(slot, sensor.metrics)
+        while not stop_event.is_set():
+            for slot, sensor in sensors:
+                try:
+                    sensor.read_message(time.monotonic() + poll_timeout)
+                except TimeoutError:
+                    sensor.metrics.timeouts += 1
+                    readings.write(slot, sensor.metrics)
+                    continue
+                readings.write(slot, sensor.metrics, time.time(), sensor.last_reply)
+    finally:
+        for _, sensor in sensors:
+            close = getattr(sensor.serial, 'close', None)
+            if close is not None:
+                close()
+
+
+class ProcessPoolCollector:
+    """ Split ports over worker processes, each running its own SDS011 instances.
+
+    Sensors are read in active report mode without handshake. Workers
+    publish the latest frame and counters of every port into a shared
+    memory array, readings() reads it without pickling. open_port(port)
+    returns the serial interface of a port and must be picklable (a module
+    level function), e.g. a factory of SimulationSDS011 instances for tests.
+    """
+
+    def __init__(self, ports: List[str], workers: int = None,
+                 open_port: Callable[[str], object] = open_serial_port,
+                 poll_timeout: float = 0.05, context: str = None):
+        self.ports = list(ports)
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        self.workers = max(1, min(workers, len(self.ports)))
+        self.open_port = open_port
+        self.poll_timeout = poll_timeout
+        self.context = multiprocessing.get_context(context)
+        self.readings_array = SharedReadings(len(self.ports), self.context)
+        self.stop_event = self.context.Event()
+        self.processes: List[multiprocessing.Process] = []
+
+    def assignments(self) -> List[List[Tuple[int, str]]]:
+        """ Slots and ports of every worker, ports dealt out in turn """
+        slots = list(enumerate(self.ports))
+        return [slots[worker::self.workers] for worker in range(self.workers)]
+
+    def start(self) -> 'ProcessPoolCollector':
+        """ Start worker processes """
+        self.stop_event.clear()
+        for number, assignments in enumerate(self.assignments()):
+            process = self.context.Process(
+                target=collect, name='SDS011Collector-%d' % number, daemon=True,
+                args=(assignments, self.readings_array, self.open_port, self.stop_event,
+                      self.poll_timeout))
+            process.start()
+            self.processes.append(process)
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """ Stop worker processes, terminate those not finishing in time """
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.processes = []
+
+    def alive(self) -> int:
+        """ Number of running workers """
+        return sum(process.is_alive() for process in self.processes)
+
+    def readings(self) -> Dict[str, Reading]:
+        """ Latest readings of all ports, timestamp is 0.0 before the first frame """
+        read = self.readings_array.read
+        return {port: read(slot, port) for slot, port in enumerate(self.ports)}
+
+    def __enter__(self) -> 'ProcessPoolCollector':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
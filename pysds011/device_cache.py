@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+""" Persisted firmware and device id of sensors keyed by serial port """
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+DEFAULT_CACHE_PATH = Path.home() / '.cache' / 'pysds011' / 'devices.json'
+
+
+class DeviceCache:
+    """ Small JSON file with the last known metadata of the sensor on each port.
+
+    Entries look like {'device_id': [10, 11], 'firmware': {'year': 15, ...}}.
+    A missing or unreadable file is treated as an empty cache.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, object]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """ Read entries from file """
+        try:
+            with open(self.path, 'r') as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            entries = {}
+        self.entries = entries if isinstance(entries, dict) else {}
+
+    def save(self) -> None:
+        """ Write entries to file, the old file is replaced atomically """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + '.tmp')
+        with open(temporary, 'w') as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def get(self, port: str) -> Optional[Dict[str, object]]:
+        """ Return entry of port or None """
+        entry = self.entries.get(port)
+        if (not isinstance(entry, dict) or len(entry.get('device_id') or ()) != 2
+                or not isinstance(entry.get('firmware'), dict)):
+            return None
+        return entry
+
+    def update(self, port: str, device_id: List[int], firmware: Dict[str, int]) -> bool:
+        """ Store metadata of port, save only if it changed. Returns True if it did. """
+        entry = {'device_id': list(device_id), 'firmware': dict(firmware)}
+        if self.entries.get(port) == entry:
+            return False
+        self.entries[port] = entry
+        self.save()
+        return True
+
+    def remove(self, port: str) -> None:
+        """ Forget port """
+        if self.entries.pop(port, None) is not None:
+            self.save()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+""" Compact measurement history with rolling aggregates """
+
+import time
+from array import array
+from collections import deque
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+
+class RollingWindow:
+    """ Rolling sum, min and max of a MeasurementHistory over a duration.
+
+    Sums are updated on every append and min/max are kept in monotonic
+    deques of sequence numbers, so updates and queries are amortized O(1).
+    Entries overwritten in the history leave the window early.
+    """
+
+    def __init__(self, history: 'MeasurementHistory', duration: float):
+        assert duration > 0
+        self.history = history
+        self.duration = duration
+        self.tail = history.count
+        self.sums = [0, 0]
+        self.minima = (deque(), deque())
+        self.maxima = (deque(), deque())
+
+    def __len__(self) -> int:
+        return self.history.count - self.tail
+
+    def push(self, sequence: int) -> None:
+        """ Add entry with sequence number of the history """
+        history = self.history
+        index = sequence % history.capacity
+        for channel, values in enumerate((history.pm25, history.pm10)):
+            value = values[index]
+            self.sums[channel] += value
+            minima = self.minima[channel]
+            while minima and values[minima[-1] % history.capacity] >= value:
+                minima.pop()
+            minima.append(sequence)
+            maxima = self.maxima[channel]
+            while maxima and values[maxima[-1] % history.capacity] <= value:
+                maxima.pop()
+            maxima.append(sequence)
+        self.expire(history.timestamps[index])
+
+    def __remove_tail(self) -> None:
+        """ Remove oldest entry of the window """
+        index = self.tail % self.history.capacity
+        self.sums[0] -= self.history.pm25[index]
+        self.sums[1] -= self.history.pm10[index]
+        for queues in (self.minima, self.maxima):
+            for queue in queues:
+                if queue and queue[0] == self.tail:
+                    queue.popleft()
+        self.tail += 1
+
+    def drop_before(self, sequence: int) -> None:
+        """ Remove entries with sequence number lower than sequence """
+        while self.tail < sequence:
+            self.__remove_tail()
+
+    def expire(self, now: float) -> None:
+        """ Remove entries older than now - duration """
+        history = self.history
+        limit = now - self.duration
+        while (self.tail < history.count and
+               history.timestamps[self.tail % history.capacity] <= limit):
+            self.__remove_tail()
+
+    def aggregate(self, now: float = None) -> Dict[str, Dict[str, float]]:
+        """ Return count and mean/min/max in ug/m^3 for PM2.5 and PM10 """
+        if now is not None:
+            self.expire(now)
+        history = self.history
+        count = len(self)
+        result = {'count': count}
+        for channel, (name, values) in enumerate((('PM2.5', history.pm25),
+                                                  ('PM10', history.pm10))):
+            if count:
+                result[name] = {
+                    'mean': self.sums[channel] / count / 10,
+                    'min': values[self.minima[channel][0] % history.capacity] / 10,
+                    'max': values[self.maxima[channel][0] % history.capacity] / 10}
+            else:
+                result[name] = {'mean': None, 'min': None, 'max': None}
+        return result
+
+
+class MeasurementHistory:
+    """ Fixed capacity history of raw measurements (0.1 ug/m^3 units).
+
+    Values are stored as uint16 and timestamps as double in arrays used
+    as ring buffer. Rolling windows are kept for the given durations in
+    seconds.
+    """
+
+    def __init__(self, capacity: int = 3600,
+                 windows: Sequence[float] = (60.0, 600.0, 3600.0)):
+        assert capacity > 0
+        self.capacity = capacity
+        self.pm25 = array('H', bytes(2 * capacity))
+        self.pm10 = array('H', bytes(2 * capacity))
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.count = 0
+        self.windows = {duration: RollingWindow(self, duration) for duration in windows}
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, pm25: int, pm10: int, timestamp: float = None) -> None:
+        """ Store raw values, timestamp defaults to time.monotonic() """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        sequence = self.count
+        if sequence >= self.capacity:
+            for window in self.windows.values():
+                window.drop_before(sequence - self.capacity + 1)
+        index = sequence % self.capacity
+        self.pm25[index] = pm25
+        self.pm10[index] = pm10
+        self.timestamps[index] = timestamp
+        self.count += 1
+        for window in self.windows.values():
+            window.push(sequence)
+
+    def __iter__(self) -> Iterator[Tuple[float, int, int]]:
+        """ Iterate stored (timestamp, pm25, pm10) from oldest to newest """
+        for sequence in range(self.count - len(self), self.count):
+            index = sequence % self.capacity
+            yield self.timestamps[index], self.pm25[index], self.pm10[index]
+
+    def latest(self, number: int) -> List[Tuple[float, int, int]]:
+        """ Return up to number newest entries, oldest first """
+        number = min(number, len(self))
+        entries = []
+        for sequence in range(self.count - number, self.count):
+            index = sequence % self.capacity
+            entries.append((self.timestamps[index], self.pm25[index], self.pm10[index]))
+        return entries
+
+    def aggregate(self, duration: float, now: float = None) -> Dict[str, Dict[str, float]]:
+        """ Return aggregates of the window with duration """
+        return self.windows[duration].aggregate(now)
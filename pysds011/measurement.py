@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+""" Immutable record of one decoded measurement """
+
+import time
+from typing import NamedTuple
+from . import codec
+
+
+class Measurement(NamedTuple):
+    """ Decoded data frame.
+
+    timestamp is the time.monotonic() value when the frame was received,
+    device_id the two id bytes as integer (byte 6 << 8 | byte 7, like in
+    pysds011.bulk) and pm25_raw/pm10_raw the values in 0.1 ug/m^3 units.
+    Float values are computed on access.
+    """
+    timestamp: float
+    device_id: int
+    pm25_raw: int
+    pm10_raw: int
+
+    @classmethod
+    def from_frame(cls, frame, timestamp: float = None) -> 'Measurement':
+        """ Decode data frame, timestamp defaults to time.monotonic() """
+        pm25, pm10 = codec.unpack_pm(frame)
+        return cls(time.monotonic() if timestamp is None else timestamp,
+                   (frame[6] << 8) | frame[7], pm25, pm10)
+
+    @property
+    def pm25(self) -> float:
+        """ PM2.5 in ug/m^3 """
+        return self.pm25_raw / 10
+
+    @property
+    def pm10(self) -> float:
+        """ PM10 in ug/m^3 """
+        return self.pm10_raw / 10
+
+    def get_device_id(self) -> str:
+        """ Return device id as hex string like SDS011.get_device_id() """
+        return '%04X' % self.device_id
+
+    def as_dict(self) -> dict:
+        """ Values like SDS011.data """
+        return {'PM2.5': self.pm25_raw / 10, 'PM10': self.pm10_raw / 10}
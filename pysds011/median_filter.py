@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+""" Sliding window median/MAD filter removing single frame spikes """
+
+import math
+import random
+from collections import deque
+from typing import Callable, List, Tuple
+
+# MAD to standard deviation of normally distributed values
+MAD_SCALE = 1.4826
+
+
+class _Node:
+    """ Skiplist node, width[level] is the number of values skipped by next[level] """
+    __slots__ = ('value', 'next', 'width')
+
+    def __init__(self, value, next_nodes: List['_Node'], width: List[int]):
+        self.value = value
+        self.next = next_nodes
+        self.width = width
+
+
+class IndexableSkiplist:
+    """ Sorted multiset with O(log n) insert, remove and access by rank """
+
+    def __init__(self, expected_size: int = 100, seed: int = None):
+        self.size = 0
+        self.levels = max(1, int(1 + math.log2(max(expected_size, 2))))
+        self.tail = _Node(math.inf, [], [])
+        self.head = _Node(None, [self.tail] * self.levels, [1] * self.levels)
+        self.random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, rank: int):
+        if not 0 <= rank < self.size:
+            raise IndexError('Rank out of range!')
+        node = self.head
+        rank += 1
+        for level in range(self.levels - 1, -1, -1):
+            while node.width[level] <= rank:
+                rank -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def insert(self, value) -> None:
+        """ Insert value """
+        chain = [None] * self.levels
+        steps_at_level = [0] * self.levels
+        node = self.head
+        for level in range(self.levels - 1, -1, -1):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        height = min(self.levels, 1 - int(math.log2(1.0 - self.random.random())))
+        new_node = _Node(value, [None] * height, [0] * height)
+        steps = 0
+        for level in range(height):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, self.levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value) -> None:
+        """ Remove one occurrence of value, raises KeyError if missing """
+        chain = [None] * self.levels
+        node = self.head
+        for level in range(self.levels - 1, -1, -1):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        if chain[0].next[0].value != value:
+            raise KeyError('Value not found!')
+        removed = chain[0].next[0]
+        for level in range(len(removed.next)):
+            previous = chain[level]
+            previous.width[level] += removed.width[level] - 1
+            previous.next[level] = removed.next[level]
+        for level in range(len(removed.next), self.levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+def kth_of_two(first: Callable[[int], float], first_length: int,
+               second: Callable[[int], float], second_length: int, k: int) -> float:
+    """ k-th smallest (from 0) value of two sorted sequences given by accessors """
+    low = max(0, k + 1 - second_length)
+    high = min(k + 1, first_length)
+    # number of values taken from the first sequence
+    while low < high:
+        taken = (low + high) // 2
+        if first(taken) < second(k - taken):
+            low = taken + 1
+        else:
+            high = taken
+    candidates = []
+    if low > 0:
+        candidates.append(first(low - 1))
+    if k - low >= 0:
+        candidates.append(second(k - low))
+    return max(candidates)
+
+
+class SlidingWindow:
+    """ Median and median absolute deviation of the last values """
+
+    def __init__(self, size: int, seed: int = None):
+        assert size >= 1
+        self.size = size
+        self.values = deque()
+        self.sorted = IndexableSkiplist(size, seed)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: int) -> None:
+        """ Add value, the oldest value leaves a full window """
+        if len(self.values) == self.size:
+            self.sorted.remove(self.values.popleft())
+        self.values.append(value)
+        self.sorted.insert(value)
+
+    def median(self) -> float:
+        """ Median of the window """
+        ordered = self.sorted
+        count = len(ordered)
+        middle = count // 2
+        if count % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def mad(self, median: float = None) -> float:
+        """ Median absolute deviation from the median of the window in O(log^2 n) """
+        ordered = self.sorted
+        count = len(ordered)
+        if median is None:
+            median = self.median()
+        split = count // 2
+        # deviations below and above the median, both ascending
+
+        def below(index: int) -> float:
+            return median - ordered[split - 1 - index]
+
+        def above(index: int) -> float:
+            return ordered[split + index] - median
+
+        middle = count // 2
+        if count % 2:
+            return kth_of_two(below, split, above, count - split, middle)
+        return (kth_of_two(below, split, above, count - split, middle - 1) +
+                kth_of_two(below, split, above, count - split, middle)) / 2
+
+
+class SlidingMedianFilter:
+    """ Hampel filter for raw PM2.5 and PM10 values (0.1 ug/m^3 units).
+
+    A value deviating from the median of the last window values (itself
+    included) by more than threshold scaled MADs, but at least by
+    min_deviation, is rejected and replaced by the rounded median. Updates
+    take O(log window) for the median and O(log^2 window) for the MAD.
+    Frames are only rejected once min_values values were seen.
+    """
+
+    def __init__(self, window: int = 5, threshold: float = 3.0, min_deviation: float = 10,
+                 min_values: int = 3, seed: int = None):
+        assert window >= 3 and threshold > 0
+        self.threshold = threshold
+        self.min_deviation = min_deviation
+        self.min_values = min_values
+        self.channels = (SlidingWindow(window, seed), SlidingWindow(window, seed))
+        self.frames = 0
+        self.rejected = 0
+
+    def __check(self, channel: SlidingWindow, value: int) -> Tuple[int, bool]:
+        """ Add value to channel, return output value and whether it was rejected """
+        channel.push(value)
+        if len(channel) < self.min_values:
+            return value, False
+        median = channel.median()
+        limit = max(self.threshold * MAD_SCALE * channel.mad(median), self.min_deviation)
+        if abs(value - median) > limit:
+            return int(median + 0.5), True
+        return value, False
+
+    def update(self, pm25: int, pm10: int) -> Tuple[int, int, bool]:
+        """ Filter raw values of one frame, returns (pm25, pm10, rejected) """
+        pm25, pm25_rejected = self.__check(self.channels[0], pm25)
+        pm10, pm10_rejected = self.__check(self.channels[1], pm10)
+        rejected = pm25_rejected or pm10_rejected
+        self.frames += 1
+        if rejected:
+            self.rejected += 1
+        return pm25, pm10, rejected
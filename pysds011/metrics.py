@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+""" Counters and latency histograms for SDS011 """
+
+import bisect
+from typing import Dict, Sequence
+from .definitions import Command
+
+# upper bounds in seconds, 9600 baud needs about 20 ms per command and reply
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LatencyHistogram:
+    """ Histogram with fixed bucket upper bounds """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # last count is for values above all bounds
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """ Add value """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, object]:
+        """ Return cumulative bucket counts, count and sum """
+        cumulative = {}
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative[bound] = total
+        cumulative[float('inf')] = self.count
+        return {'buckets': cumulative, 'count': self.count, 'sum': self.sum}
+
+
+class Metrics:
+    """ Counters and command latency histograms of one sensor """
+
+    COUNTERS = ('frames_read', 'bytes_skipped', 'invalid_frames', 'unmatched_frames',
+                'timeouts', 'commands')
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.frames_read = 0
+        self.bytes_skipped = 0
+        self.invalid_frames = 0
+        self.unmatched_frames = 0
+        self.timeouts = 0
+        self.commands = 0
+        self.latency: Dict[Command, LatencyHistogram] = {}
+
+    def observe_command(self, command: Command, seconds: float) -> None:
+        """ Add round trip latency of command """
+        histogram = self.latency.get(command)
+        if histogram is None:
+            histogram = self.latency[command] = LatencyHistogram(self.buckets)
+        histogram.observe(seconds)
+        self.commands += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        """ Return counters and histograms as dict """
+        snapshot = {name: getattr(self, name) for name in Metrics.COUNTERS}
+        snapshot['latency'] = {command.name: histogram.snapshot()
+                               for command, histogram in self.latency.items()}
+        return snapshot
+
+    def to_prometheus(self, labels: Dict[str, str] = None, prefix: str = 'sds011') -> str:
+        """ Return metrics in Prometheus text exposition format """
+        labels = labels or {}
+
+        def format_labels(extra: Dict[str, str] = None) -> str:
+            merged = dict(labels, **(extra or {}))
+            if not merged:
+                return ''
+            return '{' + ','.join('%s="%s"' % (key, str(value).replace('"', '\\"'))
+                                  for key, value in merged.items()) + '}'
+
+        lines = []
+        for name in Metrics.COUNTERS:
+            metric = '%s_%s_total' % (prefix, name)
+            lines.append('# TYPE %s counter' % metric)
+            lines.append('%s%s %d' % (metric, format_labels(), getattr(self, name)))
+        metric = prefix + '_command_latency_seconds'
+        lines.append('# TYPE %s histogram' % metric)
+        for command, histogram in self.latency.items():
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot['buckets'].items():
+                bound = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('%s_bucket%s %d' % (
+                    metric, format_labels({'command': command.name, 'le': bound}), count))
+            lines.append('%s_sum%s %r' % (metric, format_labels({'command': command.name}),
+                                          snapshot['sum']))
+            lines.append('%s_count%s %d' % (metric, format_labels({'command': command.name}),
+                                            snapshot['count']))
+        return '\n'.join(lines) + '\n'
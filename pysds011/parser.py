@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+""" Incremental zero-copy parser for SDS011 reply frames """
+
+from typing import Iterator, Optional
+from .codec import REPLY_LENGTH, HEADER, TAIL, COMMAND_REPLY, DATA
+
+
+class FrameParser:
+    """ Incremental parser for reply frames.
+
+    Chunks are copied into one preallocated buffer. Frames are validated in
+    place and returned as memoryviews into that buffer, which stay valid
+    until the next call of feed(). Unconsumed bytes are moved to the front
+    only when the buffer runs full. If a candidate frame is invalid the
+    parser resyncs at the next header byte instead of dropping 10 bytes.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        assert capacity >= REPLY_LENGTH
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        # stream offset of buffer[0]
+        self.base = 0
+        self.skipped_bytes = 0
+        self.invalid_frames = 0
+
+    @property
+    def pending(self) -> int:
+        """ Number of buffered bytes not consumed yet """
+        return self.end - self.start
+
+    @property
+    def free(self) -> int:
+        """ Number of bytes feed() accepts without dropping data """
+        return len(self.buffer) - self.pending
+
+    @property
+    def stream_offset(self) -> int:
+        """ Stream offset of the next unconsumed byte """
+        return self.base + self.start
+
+    def reset(self) -> None:
+        """ Drop buffered bytes """
+        self.base += self.end
+        self.start = 0
+        self.end = 0
+
+    def __compact(self) -> None:
+        """ Move pending bytes to the front of the buffer """
+        pending = self.end - self.start
+        if pending:
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+        self.base += self.start
+        self.start = 0
+        self.end = pending
+
+    def feed(self, chunk) -> int:
+        """ Copy bytes of chunk into the buffer, return number of bytes taken """
+        size = len(chunk)
+        if self.end + size > len(self.buffer):
+            self.__compact()
+            size = min(size, len(self.buffer) - self.end)
+        self.view[self.end:self.end + size] = chunk[:size] if size < len(chunk) else chunk
+        self.end += size
+        return size
+
+    def frame_valid_at(self, position: int) -> bool:
+        """ Validate frame starting at position in the buffer """
+        buffer = self.buffer
+        message_type = buffer[position + 1]
+        return (buffer[position + 9] == TAIL and
+                (message_type == DATA or message_type == COMMAND_REPLY) and
+                (buffer[position + 2] + buffer[position + 3] + buffer[position + 4] +
+                 buffer[position + 5] + buffer[position + 6] + buffer[position + 7])
+                % 256 == buffer[position + 8])
+
+    def next_frame(self) -> Optional[memoryview]:
+        """ Return the next valid frame or None if more bytes are needed """
+        buffer = self.buffer
+        end = self.end
+        position = buffer.find(HEADER, self.start, end)
+        while position >= 0 and end - position >= REPLY_LENGTH:
+            if self.frame_valid_at(position):
+                self.skipped_bytes += position - self.start
+                self.start = position + REPLY_LENGTH
+                return self.view[position:self.start]
+            self.invalid_frames += 1
+            position = buffer.find(HEADER, position + 1, end)
+        # keep only a possible partial frame
+        if position < 0:
+            position = end
+        self.skipped_bytes += position - self.start
+        self.start = position
+        return None
+
+    def parse(self, chunk) -> Iterator[memoryview]:
+        """ Feed chunk of any size and yield all completed frames """
+        chunk = memoryview(chunk)
+        while True:
+            taken = self.feed(chunk)
+            chunk = chunk[taken:]
+            frame = self.next_frame()
+            while frame is not None:
+                yield frame
+                frame = self.next_frame()
+            if not chunk:
+                break
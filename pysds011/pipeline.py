@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+""" Pipelined commands: several commands in one write """
+
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from .definitions import WorkingMode
+from .definitions import ReportMode
+from .definitions import Modifier
+from .definitions import Command
+from .codec import DATA
+from .sds011 import SDS011
+
+
+class CommandPipeline:
+    """ Queue commands for a sensor, send them in one write and match the replies.
+
+    Replies are matched to queued commands by command byte and device id
+    in queue order. DATA frames received in between are decoded by the
+    sensor, so no measurement is lost. Methods return the pipeline so
+    calls can be chained:
+
+        pipeline = CommandPipeline(sensor)
+        pipeline.set_report_mode(ReportMode.REPORT_QUERY_MODE).set_working_period(5)
+        replies = pipeline.get_firmware_version().execute()
+    """
+
+    def __init__(self, sensor: SDS011):
+        self.sensor = sensor
+        self.commands: List[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def add(self, command: Command, data: List[int],
+            device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue command, invalid commands are ignored like in SDS011 """
+        command_message = SDS011.command_frame(command, data, device_id)
+        if command_message:
+            self.commands.append(command_message)
+        return self
+
+    def set_report_mode(self, report_mode: ReportMode,
+                        device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue set report mode """
+        return self.add(Command.REPORT_MODE, [Modifier.SET.value, report_mode.value], device_id)
+
+    def get_report_mode(self, device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue get report mode """
+        return self.add(Command.REPORT_MODE, [Modifier.GET.value], device_id)
+
+    def query_data(self, device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue query data """
+        return self.add(Command.QUERY_DATA, [0], device_id)
+
+    def set_device_id(self, new_device_id: List[int],
+                      device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue set device id """
+        return self.add(Command.SET_DEVICE_ID, [0]*10 + new_device_id, device_id)
+
+    def set_working_mode(self, working_mode: WorkingMode,
+                         device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue set working mode """
+        return self.add(Command.WORKING_MODE, [Modifier.SET.value, working_mode.value], device_id)
+
+    def get_working_mode(self, device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue get working mode """
+        return self.add(Command.WORKING_MODE, [Modifier.GET.value], device_id)
+
+    def get_firmware_version(self, device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue get firmware version """
+        return self.add(Command.GET_FIRMWARE, [0], device_id)
+
+    def set_working_period(self, working_period: int = 0,
+                           device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue set working period """
+        assert 0 <= working_period <= 30
+        return self.add(Command.WORKING_PERIOD, [Modifier.SET.value, working_period], device_id)
+
+    def get_working_period(self, device_id: List[int] = None) -> 'CommandPipeline':
+        """ Queue get working period """
+        return self.add(Command.WORKING_PERIOD, [Modifier.GET.value], device_id)
+
+    @staticmethod
+    def reply_device_id(command_message: bytes) -> Optional[bytes]:
+        """ Device id expected in the reply, None for broadcast commands """
+        if command_message[2] == Command.SET_DEVICE_ID.value:
+            return command_message[13:15]
+        if command_message[15:17] == b'\xff\xff':
+            return None
+        return command_message[15:17]
+
+    def __match(self, reply: bytes, pending: Dict[int, Deque[int]]) -> Optional[int]:
+        """ Return index of the oldest queued command answered by reply """
+        if reply[1] == DATA:
+            candidates = pending.get(Command.QUERY_DATA.value)
+        else:
+            candidates = pending.get(reply[2])
+        if not candidates:
+            return None
+        for index in candidates:
+            device_id = CommandPipeline.reply_device_id(self.commands[index])
+            if device_id is None or reply[6:8] == device_id:
+                candidates.remove(index)
+                return index
+        return None
+
+    def __apply(self, command_message: bytes, reply: bytes) -> None:
+        """ Update sensor state like the single command methods """
+        sensor = self.sensor
+        sensor.last_command = command_message
+        sensor.last_reply = reply
+        if command_message[2] == Command.GET_FIRMWARE.value:
+            sensor.firmware = {'year': reply[3], 'month': reply[4], 'day': reply[5]}
+            sensor.device_id = [reply[6], reply[7]]
+        elif command_message[2] == Command.SET_DEVICE_ID.value:
+            sensor.device_id = [reply[6], reply[7]]
+
+    def execute(self, timeout: float = None) -> List[bytes]:
+        """ Write all queued commands at once and return the replies in queue order.
+
+        Waits at most timeout seconds (default: sensor.timeout) for all replies.
+        """
+        sensor = self.sensor
+        commands = self.commands
+        replies: List[Optional[bytes]] = [None] * len(commands)
+        if not commands:
+            return []
+        if sensor.handshake_pending:
+            sensor.handshake(timeout)
+        pending: Dict[int, Deque[int]] = {}
+        for index, command_message in enumerate(commands):
+            pending.setdefault(command_message[2], deque()).append(index)
+        open_commands = len(commands)
+        open_queries = len(pending.get(Command.QUERY_DATA.value, ()))
+
+        sensor.reader.reset()
+        deadline = time.monotonic() + (sensor.timeout if timeout is None else timeout)
+        sensor.serial.write(b''.join(commands))
+        while open_commands:
+            # a BackgroundReader delivers command replies and DATA frames separately
+            read = sensor.read_reply if open_commands > open_queries else sensor.read_message
+            try:
+                read(deadline)
+            except TimeoutError:
+                if sensor.metrics is not None:
+                    sensor.metrics.timeouts += 1
+                raise TimeoutError('No reply received from sensor for %d commands!'
+                                   % open_commands) from None
+            reply = sensor.last_reply
+            index = self.__match(reply, pending)
+            if reply[1] == DATA:
+                sensor.decode_data()
+            if index is None:
+                if sensor.metrics is not None:
+                    sensor.metrics.unmatched_frames += 1
+                continue
+            replies[index] = reply
+            self.__apply(commands[index], reply)
+            open_commands -= 1
+            if commands[index][2] == Command.QUERY_DATA.value:
+                open_queries -= 1
+        self.commands = []
+        return replies
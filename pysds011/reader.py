@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+""" Buffered frame reader for the SDS011 serial stream """
+
+import time
+from typing import Iterator, Optional
+from .parser import FrameParser, REPLY_LENGTH
+
+
+class FrameReader:
+    """ Read complete and valid reply frames from a serial interface.
+
+    Bytes are pulled in chunks (everything the port has waiting, but at least
+    the bytes needed to complete the next frame) and leftovers are kept
+    between calls in a FrameParser.
+
+    Reads may be limited by a deadline (time.monotonic() value). Open real
+    ports with a read timeout, e.g. serial.Serial(port, 9600, timeout=0.1),
+    otherwise a read can block past the deadline. If a read returns no
+    bytes faster than idle_sleep, the reader sleeps the rest of idle_sleep
+    instead of spinning.
+    """
+
+    def __init__(self, serial, capacity: int = 4096, idle_sleep: float = 0.005):
+        self.serial = serial
+        self.parser = FrameParser(capacity)
+        self.idle_sleep = idle_sleep
+
+    def reset(self) -> None:
+        """ Drop buffered bytes """
+        self.parser.reset()
+
+    def __bytes_to_read(self) -> int:
+        """ Number of bytes to request with the next read call """
+        needed = REPLY_LENGTH - self.parser.pending
+        waiting = getattr(self.serial, 'in_waiting', 0)
+        return min(max(needed, waiting), self.parser.free)
+
+    def __read_chunk(self, deadline: Optional[float]) -> None:
+        """ Read available bytes into the parser, wait instead of spinning on empty reads """
+        start = time.monotonic()
+        chunk = self.serial.read(self.__bytes_to_read())
+        if chunk:
+            self.parser.feed(chunk)
+            return
+        now = time.monotonic()
+        idle = self.idle_sleep - (now - start)
+        if deadline is not None:
+            idle = min(idle, deadline - now)
+        if idle > 0:
+            time.sleep(idle)
+
+    def read_frame_view(self, deadline: float = None) -> memoryview:
+        """ Read until a valid frame is complete and return it without copy.
+
+        The returned memoryview is only valid until the next read.
+        Raises TimeoutError if deadline passes before. Waiting bytes are
+        read at least once, so read_frame(time.monotonic()) polls without
+        waiting.
+        """
+        parser = self.parser
+        frame = parser.next_frame()
+        while frame is None:
+            self.__read_chunk(deadline)
+            frame = parser.next_frame()
+            if frame is None and deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError('No frame received from sensor!')
+        return frame
+
+    def read_frame(self, deadline: float = None) -> bytes:
+        """ Read from serial interface until a valid frame is complete """
+        return bytes(self.read_frame_view(deadline))
+
+    def read_reply(self, deadline: float = None) -> bytes:
+        """ Read next frame while waiting for a command reply """
+        return self.read_frame(deadline)
+
+    def frames(self) -> Iterator[bytes]:
+        """ Yield valid frames continuously """
+        while True:
+            yield self.read_frame()
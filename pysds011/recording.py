@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+""" Compact binary recording of measurements
+
+File layout:
+    file header   b'SDSR' + version byte
+    blocks        block header + payload
+
+Block header (little endian, see BLOCK_HEADER):
+    magic b'SB', device id (2 bytes as sent by the sensor), record count,
+    payload length, first and last timestamp in ms, first PM2.5 and PM10.
+Payload for every further record of the block:
+    varint timestamp delta in ms, zigzag varint PM2.5 delta,
+    zigzag varint PM10 delta.
+Values are the sensor's raw 0.1 ug/m^3 integers. Timestamps of one device
+must not decrease.
+"""
+
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Tuple, Union
+
+FILE_MAGIC = b'SDSR'
+FILE_VERSION = 1
+BLOCK_MAGIC = b'SB'
+BLOCK_HEADER = struct.Struct('<2s2sHIqqHH')
+
+
+class BlockHeader(NamedTuple):
+    """ Header of one block """
+    device_id: List[int]
+    count: int
+    payload_length: int
+    first_timestamp: float
+    last_timestamp: float
+
+
+def _append_varint(buffer: bytearray, value: int) -> None:
+    """ Append unsigned LEB128 varint """
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _zigzag(value: int) -> int:
+    """ Map signed to unsigned integer """
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    """ Map unsigned to signed integer """
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+class _Block:
+    """ Pending block of one device """
+
+    def __init__(self, device_id: bytes, timestamp: int, pm25: int, pm10: int):
+        self.device_id = device_id
+        self.first = (timestamp, pm25, pm10)
+        self.last = self.first
+        self.count = 1
+        self.payload = bytearray()
+
+    def add(self, timestamp: int, pm25: int, pm10: int) -> None:
+        """ Add delta encoded record """
+        last_timestamp, last_pm25, last_pm10 = self.last
+        _append_varint(self.payload, timestamp - last_timestamp)
+        _append_varint(self.payload, _zigzag(pm25 - last_pm25))
+        _append_varint(self.payload, _zigzag(pm10 - last_pm10))
+        self.last = (timestamp, pm25, pm10)
+        self.count += 1
+
+    def to_bytes(self) -> bytes:
+        """ Return block header and payload """
+        return BLOCK_HEADER.pack(BLOCK_MAGIC, self.device_id, self.count, len(self.payload),
+                                 self.first[0], self.last[0],
+                                 self.first[1], self.first[2]) + self.payload
+
+
+class RecordWriter:
+    """ Write measurements in blocks of block_size records per device """
+
+    def __init__(self, file: Union[str, Path, BinaryIO], block_size: int = 256):
+        assert 1 <= block_size <= 0xffff
+        if isinstance(file, (str, Path)):
+            self.file = open(file, 'wb')
+            self.own_file = True
+        else:
+            self.file = file
+            self.own_file = False
+        self.block_size = block_size
+        self.blocks: Dict[bytes, _Block] = {}
+        self.last_timestamps: Dict[bytes, int] = {}
+        self.file.write(FILE_MAGIC + bytes([FILE_VERSION]))
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, device_id: List[int], pm25: int, pm10: int,
+              timestamp: float = None) -> None:
+        """ Add raw measurement, timestamp in seconds defaults to time.time() """
+        if timestamp is None:
+            timestamp = time.time()
+        timestamp_ms = int(round(timestamp * 1000))
+        key = bytes(device_id)
+        if timestamp_ms < self.last_timestamps.get(key, timestamp_ms):
+            raise ValueError('Timestamps of a device must not decrease!')
+        self.last_timestamps[key] = timestamp_ms
+        block = self.blocks.get(key)
+        if block is None:
+            self.blocks[key] = _Block(key, timestamp_ms, pm25, pm10)
+            return
+        block.add(timestamp_ms, pm25, pm10)
+        if block.count >= self.block_size:
+            self.file.write(block.to_bytes())
+            del self.blocks[key]
+
+    def flush(self) -> None:
+        """ Write pending blocks """
+        for block in self.blocks.values():
+            self.file.write(block.to_bytes())
+        self.blocks.clear()
+        self.file.flush()
+
+    def close(self) -> None:
+        """ Write pending blocks and close own file """
+        self.flush()
+        if self.own_file:
+            self.file.close()
+
+
+class RecordReader:
+    """ Read recorded measurements block by block """
+
+    def __init__(self, file: Union[str, Path, BinaryIO]):
+        if isinstance(file, (str, Path)):
+            self.file = open(file, 'rb')
+            self.own_file = True
+        else:
+            self.file = file
+            self.own_file = False
+        header = self.file.read(len(FILE_MAGIC) + 1)
+        if header[:len(FILE_MAGIC)] != FILE_MAGIC or header[-1] != FILE_VERSION:
+            raise ValueError('Not a SDS011 recording!')
+        self.data_start = self.file.tell()
+
+    def __enter__(self) -> 'RecordReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """ Close own file """
+        if self.own_file:
+            self.file.close()
+
+    def __read_header(self):
+        """ Read next block header, None at end of file """
+        header = self.file.read(BLOCK_HEADER.size)
+        if not header:
+            return None
+        if len(header) < BLOCK_HEADER.size:
+            raise ValueError('Truncated block header!')
+        fields = BLOCK_HEADER.unpack(header)
+        if fields[0] != BLOCK_MAGIC:
+            raise ValueError('Invalid block header!')
+        return fields
+
+    def blocks(self) -> Iterator[Tuple[BlockHeader, Iterator[Tuple[float, List[int], int, int]]]]:
+        """ Yield block header and a lazy record iterator for every block.
+
+        Payload of a block is only read if its record iterator is used
+        before the next block is requested.
+        """
+        self.file.seek(self.data_start)
+        while True:
+            fields = self.__read_header()
+            if fields is None:
+                return
+            _, device_id, count, length, first_ms, last_ms, pm25, pm10 = fields
+            header = BlockHeader(list(device_id), count, length, first_ms / 1000, last_ms / 1000)
+            payload_start = self.file.tell()
+            records = self.__records(header, first_ms, pm25, pm10, payload_start)
+            yield header, records
+            self.file.seek(payload_start + length)
+
+    def __records(self, header: BlockHeader, timestamp: int, pm25: int, pm10: int,
+                  payload_start: int) -> Iterator[Tuple[float, List[int], int, int]]:
+        """ Decode records of one block """
+        device_id = header.device_id
+        yield timestamp / 1000, device_id, pm25, pm10
+        position = self.file.tell()
+        self.file.seek(payload_start)
+        payload = self.file.read(header.payload_length)
+        self.file.seek(position)
+        values = [0, 0, 0]
+        index = 0
+        for _ in range(header.count - 1):
+            for field in range(3):
+                value = 0
+                shift = 0
+                while True:
+                    byte = payload[index]
+                    index += 1
+                    value |= (byte & 0x7f) << shift
+                    if byte < 0x80:
+                        break
+                    shift += 7
+                values[field] = value
+            timestamp += values[0]
+            pm25 += _unzigzag(values[1])
+            pm10 += _unzigzag(values[2])
+            yield timestamp / 1000, device_id, pm25, pm10
+
+    def records(self, device_id: List[int] = None, start: float = None,
+                end: float = None) -> Iterator[Tuple[float, List[int], int, int]]:
+        """ Yield (timestamp, device_id, pm25, pm10), skipping blocks outside the filter """
+        for header, block_records in self.blocks():
+            if device_id is not None and header.device_id != list(device_id):
+                continue
+            if start is not None and header.last_timestamp < start:
+                continue
+            if end is not None and header.first_timestamp > end:
+                continue
+            for record in block_records:
+                if start is not None and record[0] < start:
+                    continue
+                if end is not None and record[0] > end:
+                    break
+                yield record
+
+    def __iter__(self) -> Iterator[Tuple[float, List[int], int, int]]:
+        return self.records()
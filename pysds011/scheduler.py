@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+""" Staggered duty cycling of a fleet of SDS011 sensors """
+
+import heapq
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from .definitions import WorkingMode, ReportMode
+
+WAKE = 'wake'
+QUERY = 'query'
+# slots of the load histogram used by plan()
+MAX_HORIZON = 1 << 16
+
+
+class SensorPlan:
+    """ Sampling plan of one sensor.
+
+    The sensor is queried every interval seconds. If the gap between two
+    queries leaves at least min_sleep seconds after a warmup of warmup
+    seconds, it sleeps in between and is woken warmup seconds before each
+    query, otherwise it keeps running. port groups sensors sharing a serial
+    line, by default sensor.serial.port.
+    """
+
+    def __init__(self, sensor, interval: float, warmup: float = 30.0, port: str = None):
+        assert interval > 0 and warmup >= 0
+        self.sensor = sensor
+        self.interval = interval
+        self.warmup = warmup
+        if port is None:
+            port = getattr(getattr(sensor, 'serial', None), 'port', None)
+        self.port = port
+        self.phase = 0.0
+        self.duty_cycled = False
+        self.data: Dict[str, float] = {}
+        self.samples = 0
+        self.errors = 0
+        self.actions = 0
+        self.drift_sum = 0.0
+        self.drift_max = 0.0
+        self.first_sample: Optional[float] = None
+        self.last_sample: Optional[float] = None
+
+    def name(self) -> str:
+        """ Device id of the sensor as hex string if known """
+        if getattr(self.sensor, 'device_id', None):
+            return self.sensor.get_device_id()
+        return '%x' % id(self.sensor)
+
+    def observe(self, planned: float, actual: float) -> None:
+        """ Record how late an action started """
+        drift = actual - planned
+        self.actions += 1
+        self.drift_sum += drift
+        self.drift_max = max(self.drift_max, drift)
+
+    def report(self) -> Dict[str, object]:
+        """ Return sampling and drift statistics """
+        achieved = None
+        if self.samples >= 2:
+            achieved = (self.last_sample - self.first_sample) / (self.samples - 1)
+        return {'port': self.port,
+                'interval': self.interval,
+                'achieved_interval': achieved,
+                'phase': self.phase,
+                'duty_cycled': self.duty_cycled,
+                'samples': self.samples,
+                'errors': self.errors,
+                'mean_drift': self.drift_sum / self.actions if self.actions else 0.0,
+                'max_drift': self.drift_max}
+
+
+class DutyCycleScheduler:
+    """ Plans and runs wake, query and sleep commands of many sensors.
+
+    plan() picks a phase for every sensor so commands are spread evenly over
+    time, first per port and then over the whole host, while every sensor
+    keeps its interval. Time is split into slots of slot seconds and each
+    sensor greedily gets the candidate phase whose busiest slot is least
+    loaded and, among those, which is farthest from other commands.
+    run_pending() executes due commands in one thread and records
+    how late each started. Phases are planned on the host, because the
+    firmware working period cannot be aligned to a given start time.
+    """
+
+    def __init__(self, plans: List[SensorPlan], slot: float = 0.1, min_sleep: float = 60.0,
+                 candidates: int = 64, clock: Callable[[], float] = time.monotonic):
+        assert slot > 0 and candidates >= 1
+        self.plans = list(plans)
+        self.slot = slot
+        self.min_sleep = min_sleep
+        self.candidates = candidates
+        self.clock = clock
+        self.start: Optional[float] = None
+        self.queue: List[Tuple[float, int, str, SensorPlan]] = []
+        self.sequence = 0
+        self.on_data: Optional[Callable[[SensorPlan], None]] = None
+
+    def __horizon(self) -> int:
+        """ Number of slots after which the combined schedule repeats (capped) """
+        periods = [max(1, round(plan.interval / self.slot)) for plan in self.plans]
+        horizon = 1
+        for period in periods:
+            horizon = horizon * period // math.gcd(horizon, period)
+            if horizon > MAX_HORIZON:
+                return max(periods)
+        return horizon
+
+    def __slots(self, plan: SensorPlan, phase: float, horizon: int) -> List[int]:
+        """ Slots of all commands of plan within the horizon """
+        slots = []
+        offsets = (0.0, plan.warmup) if plan.duty_cycled else (plan.warmup,)
+        period = horizon * self.slot
+        cycle = 0.0
+        while cycle < period:
+            for offset in offsets:
+                slots.append(int((phase + cycle + offset) / self.slot) % horizon)
+            cycle += plan.interval
+        return slots
+
+    @staticmethod
+    def __distances(load: List[int]) -> List[int]:
+        """ Distance of every slot to the nearest loaded slot, wrapping around """
+        horizon = len(load)
+        distances = [horizon] * horizon
+        if not any(load):
+            return distances
+        # two rounds in each direction carry distances over the wrap around
+        for slots in (range(2 * horizon), range(2 * horizon - 1, -1, -1)):
+            distance = horizon
+            for index in slots:
+                slot = index % horizon
+                distance = 0 if load[slot] else distance + 1
+                if distance < distances[slot]:
+                    distances[slot] = distance
+        return distances
+
+    def plan(self) -> None:
+        """ Assign phases to all sensors, faster sensors first """
+        horizon = self.__horizon()
+        host_load = [0] * horizon
+        port_load: Dict[object, List[int]] = {}
+        for plan in sorted(self.plans, key=lambda plan: plan.interval):
+            plan.duty_cycled = plan.interval - plan.warmup >= self.min_sleep
+            load = port_load.setdefault(plan.port, [0] * horizon)
+            port_distances = DutyCycleScheduler.__distances(load)
+            host_distances = DutyCycleScheduler.__distances(host_load)
+            best = None
+            for candidate in range(self.candidates):
+                phase = plan.interval * candidate / self.candidates
+                slots = self.__slots(plan, phase, horizon)
+                # fewest commands in the busiest slot, then farthest from other commands
+                cost = (max(load[slot] for slot in slots),
+                        max(host_load[slot] for slot in slots),
+                        -min(port_distances[slot] for slot in slots),
+                        -min(host_distances[slot] for slot in slots))
+                if best is None or cost < best[0]:
+                    best = (cost, phase, slots)
+            plan.phase = best[1]
+            for slot in best[2]:
+                load[slot] += 1
+                host_load[slot] += 1
+
+    def __push(self, when: float, action: str, plan: SensorPlan) -> None:
+        """ Queue command of plan at planned time when """
+        self.sequence += 1
+        heapq.heappush(self.queue, (when, self.sequence, action, plan))
+
+    def setup(self, start: float = None) -> None:
+        """ Plan phases, switch sensors to query mode and queue their first commands """
+        self.plan()
+        self.start = self.clock() if start is None else start
+        self.queue = []
+        for plan in self.plans:
+            try:
+                plan.sensor.set_report_mode(ReportMode.REPORT_QUERY_MODE)
+                plan.sensor.set_working_period(0)
+                plan.sensor.set_working_mode(WorkingMode.SLEEP_MODE if plan.duty_cycled
+                                             else WorkingMode.WORK_MODE)
+            except TimeoutError:
+                plan.errors += 1
+            query = self.start + plan.warmup + plan.phase
+            if plan.duty_cycled:
+                self.__push(query - plan.warmup, WAKE, plan)
+            else:
+                self.__push(query, QUERY, plan)
+
+    def next_time(self) -> Optional[float]:
+        """ Planned time of the next command """
+        return self.queue[0][0] if self.queue else None
+
+    def __execute(self, action: str, plan: SensorPlan, planned: float) -> None:
+        """ Send command and queue the next one of the plan """
+        sensor = plan.sensor
+        try:
+            if action == WAKE:
+                sensor.set_working_mode(WorkingMode.WORK_MODE)
+            else:
+                sensor.query_data()
+                sensor.decode_data()
+                now = self.clock()
+                plan.data = dict(sensor.data)
+                plan.samples += 1
+                if plan.first_sample is None:
+                    plan.first_sample = now
+                plan.last_sample = now
+                if plan.duty_cycled:
+                    sensor.set_working_mode(WorkingMode.SLEEP_MODE)
+                if self.on_data is not None:
+                    self.on_data(plan)
+        except TimeoutError:
+            plan.errors += 1
+        # the next command is planned from the plan, not from the late start
+        if action == WAKE:
+            self.__push(planned + plan.warmup, QUERY, plan)
+        elif plan.duty_cycled:
+            self.__push(planned + plan.interval - plan.warmup, WAKE, plan)
+        else:
+            self.__push(planned + plan.interval, QUERY, plan)
+
+    def run_pending(self) -> int:
+        """ Execute all due commands, return how many were executed """
+        if self.start is None:
+            self.setup()
+        executed = 0
+        while self.queue and self.queue[0][0] <= self.clock():
+            planned, _, action, plan = heapq.heappop(self.queue)
+            plan.observe(planned, self.clock())
+            self.__execute(action, plan, planned)
+            executed += 1
+        return executed
+
+    def run(self, duration: float = None, sleep: Callable[[float], None] = time.sleep) -> None:
+        """ Execute commands as planned, for duration seconds or forever """
+        if self.start is None:
+            self.setup()
+        if not self.queue:
+            return
+        end = None if duration is None else self.clock() + duration
+        while end is None or self.clock() < end:
+            self.run_pending()
+            wait = self.next_time() - self.clock()
+            if end is not None:
+                wait = min(wait, end - self.clock())
+            if wait > 0:
+                sleep(wait)
+
+    def report(self) -> Dict[str, object]:
+        """ Return per sensor statistics and the worst drift of the fleet """
+        sensors = {plan.name(): plan.report() for plan in self.plans}
+        return {'sensors': sensors,
+                'max_drift': max((plan.drift_max for plan in self.plans), default=0.0),
+                'errors': sum(plan.errors for plan in self.plans),
+                'samples': sum(plan.samples for plan in self.plans)}
@@ -2,80 +2,172 @@
 
 """ Class for control the SDS011 sensor. """
 
-from typing import List
+import time
+from typing import Dict, List, Optional, Tuple
 from .definitions import WorkingMode
 from .definitions import ReportMode
 from .definitions import Modifier
-from .definitions import Frame
 from .definitions import Command
-from .definitions import MessageType
+from . import codec
+from .background import BackgroundReader
+from .device_cache import DeviceCache
+from .history import MeasurementHistory
+from .measurement import Measurement
+from .median_filter import SlidingMedianFilter
+from .metrics import Metrics
+from .reader import FrameReader
+
+QUERY_DATA = Command.QUERY_DATA.value
 
 
 class SDS011:
     """ Class for control the SDS011 sensor. """
-    def __init__(self, serial):
-        """ Initialisation """
+    # validated command frames by (command, data, device_id), None for invalid commands
+    command_cache: Dict[Tuple[Command, Tuple[int, ...], Tuple[int, ...]], Optional[bytes]] = {}
+    command_cache_size = 4096
+
+    def __init__(self, serial, history: MeasurementHistory = None,
+                 metrics: Metrics = None, timeout: float = 3.0,
+                 background: bool = False, lazy: bool = False,
+                 device_cache: DeviceCache = None,
+                 median_filter: SlidingMedianFilter = None):
+        """ Initialisation
+
+        Optional history stores every decoded measurement, optional metrics
+        counts frames, errors and command latencies. timeout is the default
+        time in seconds commands wait for their reply. With background the
+        serial interface is read by a BackgroundReader thread, stop it with
+        sensor.reader.stop().
+
+        With lazy the firmware handshake is deferred to the first command,
+        data can be read right away. An optional device_cache provides the
+        firmware and device id last seen on serial.port until the handshake
+        confirms or corrects them.
+
+        An optional median_filter replaces spikes in decoded data by the
+        median of the last values, rejected tells if the last frame was.
+        """
         self.device_id = [255, 255]
         self.firmware = None
         self.serial = serial
         self.serial.flushInput()
+        if background:
+            self.reader = BackgroundReader(serial).start()
+        else:
+            self.reader = FrameReader(serial)
         self.device_id = None
         self.data = {'PM2.5': 0.0, 'PM10': 0.0}
+        self.measurement: Optional[Measurement] = None
+        self.history = history
+        self.median_filter = median_filter
+        self.rejected = False
+        self.metrics = metrics
+        self.timeout = timeout
         self.last_command = b''
         self.last_reply = b''
-        self.get_firmware_version()
+        self.last_reply_time = 0.0
+        self.device_cache = device_cache
+        self.port = getattr(serial, 'port', None)
+        self.handshake_pending = True
+        if device_cache is not None and self.port is not None:
+            entry = device_cache.get(self.port)
+            if entry is not None:
+                self.device_id = list(entry['device_id'])
+                self.firmware = dict(entry['firmware'])
+        if not lazy:
+            self.handshake()
+
+    def handshake(self, timeout: float = None) -> bool:
+        """ Get firmware version and device id, update the device cache
+
+        Returns False if they differ from the cached (or previously known)
+        metadata, True otherwise.
+        """
+        known = (self.device_id, self.firmware)
+        self.get_firmware_version(timeout=timeout)
+        return known[0] is None or known == (self.device_id, self.firmware)
 
-    def read_message(self):
-        """ Read message from serial interface """
-        header = 0
-        while header != bytes([Frame.HEADER.value]):
-            header = self.serial.read(size=1)
-        message_type = self.serial.read(size=1)
-        self.last_reply = header + message_type + self.serial.read(size=8)
+    def read_message(self, deadline: float = None):
+        """ Read next valid message from serial interface
+
+        Raises TimeoutError if the deadline (time.monotonic() value) passes.
+        """
+        self.__store_reply(self.reader.read_frame(deadline))
+
+    def read_reply(self, deadline: float = None):
+        """ Read next message while waiting for a command reply
+
+        Same as read_message(), except with a BackgroundReader it returns
+        the next COMMAND_REPLY frame instead of the next DATA frame.
+        """
+        self.__store_reply(self.reader.read_reply(deadline))
+
+    def __store_reply(self, reply: bytes) -> None:
+        """ Keep received frame as last reply """
+        self.last_reply = reply
+        self.last_reply_time = time.monotonic()
+        if self.metrics is not None:
+            metrics = self.metrics
+            metrics.frames_read += 1
+            metrics.bytes_skipped = self.reader.parser.skipped_bytes
+            metrics.invalid_frames = self.reader.parser.invalid_frames
+
+    @staticmethod
+    def command_valid(command_message: bytes) -> bool:
+        """ Validate command frame """
+        return codec.command_valid(command_message)
 
     def command_message_valid(self) -> bool:
         """ Validate generated command """
-        if len(self.last_command) == 19:
-            if (self.last_command[0] == Frame.HEADER.value and
-                    self.last_command[1] == MessageType.COMMAND.value and
-                    self.last_command[-1] == Frame.TAIL.value):
-                if self.__valid_checksum(self.last_command):
-                    return True
-        return False
+        return SDS011.command_valid(self.last_command)
 
     def reply_message_valid(self) -> bool:
         """ Validate reply from device """
-        if len(self.last_reply) == 10:
-            if (self.last_reply[0] == Frame.HEADER.value and
-                    self.last_reply[-1] == Frame.TAIL.value):
-                if (self.last_reply[1] == MessageType.COMMAND_REPLY.value or
-                        self.last_reply[1] == MessageType.DATA.value):
-                    if self.__valid_checksum(self.last_reply):
-                        return True
-        return False
+        return codec.reply_valid(self.last_reply)
 
     @staticmethod
     def calculate_checksum(message_data: List[int]) -> int:
         """ Calculate checksum """
-        return sum(message_data) % 256
+        return codec.checksum(message_data)
 
-    def __valid_checksum(self, message) -> bool:
-        """ Validaty correct checksum for command or reply """
-        message_data = []
-        for i in range(len(message[2:-2])):
-            message_data.append(message[2+i])
-        return SDS011.calculate_checksum(message_data) == message[-2]
+    def decode_data(self) -> Optional[Measurement]:
+        """ Decode measured data from device if reply from device is valid
 
-    def decode_data(self) -> None:
-        """ Decode measured data from device if reply from device is valid """
-        if self.reply_message_valid():
-            self.data['PM2.5'] = ((self.last_reply[3] << 8) + self.last_reply[2])/10
-            self.data['PM10'] = ((self.last_reply[5] << 8) + self.last_reply[4])/10
+        Returns the Measurement (also kept as self.measurement) and updates
+        self.data, None if the reply is invalid.
+        """
+        reply = self.last_reply
+        if not codec.reply_valid(reply):
+            return None
+        pm25, pm10 = codec.unpack_pm(reply)
+        if self.median_filter is not None:
+            pm25, pm10, self.rejected = self.median_filter.update(pm25, pm10)
+        measurement = Measurement(self.last_reply_time, (reply[6] << 8) | reply[7], pm25, pm10)
+        self.measurement = measurement
+        self.data['PM2.5'] = pm25/10
+        self.data['PM10'] = pm10/10
+        if self.history is not None:
+            self.history.append(pm25, pm10, measurement.timestamp)
+        return measurement
 
-    def read_and_decode_data(self):
-        """ Read and decode data from device """
-        self.read_message()
-        self.decode_data()
+    def read_and_decode_data(self, timeout: float = None) -> Optional[Measurement]:
+        """ Read and decode data from device, wait at most timeout seconds if given """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.read_message(deadline)
+        return self.decode_data()
+
+    def read_measurements(self, count: int, timeout: float = None) -> List[Measurement]:
+        """ Read up to count data frames, fewer if timeout seconds pass first """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        measurements = []
+        while len(measurements) < count:
+            try:
+                self.read_message(deadline)
+            except TimeoutError:
+                break
+            if self.last_reply[1] == codec.DATA:
+                measurements.append(self.decode_data())
+        return measurements
 
     def print_firmware(self):
         """ Print firmware version """
@@ -99,98 +191,138 @@ class SDS011:
         """ Return device id as hex string """
         return str(bytes(self.device_id).hex()).upper()
 
+    @staticmethod
+    def build_command(command: Command, data: List[int],
+                      device_id: List[int] = None) -> bytes:
+        """ Build command frame for device control """
+        return codec.pack_command(command.value, data, device_id)
+
+    @staticmethod
+    def is_reply_for(command_message: bytes, reply: bytes) -> bool:
+        """ Check if reply answers the command """
+        if command_message[2] == QUERY_DATA:
+            return reply[1] == codec.DATA
+        return reply[1] == codec.COMMAND_REPLY and reply[2] == command_message[2]
+
+    @staticmethod
+    def command_frame(command: Command, data: List[int],
+                      device_id: List[int] = None) -> Optional[bytes]:
+        """ Return validated command frame from cache, None if invalid """
+        key = (command, tuple(data), tuple(device_id) if device_id else (255, 255))
+        try:
+            return SDS011.command_cache[key]
+        except KeyError:
+            pass
+        command_message = SDS011.build_command(command, data, device_id)
+        if not SDS011.command_valid(command_message):
+            command_message = None
+        if len(SDS011.command_cache) < SDS011.command_cache_size:
+            SDS011.command_cache[key] = command_message
+        return command_message
+
     def __prepare_command(self, command: Command, data: List[int],
                           device_id: List[int] = None) -> None:
-        """ Build command for device control """
-        assert len(data) <= 12
-        if not device_id:
-            device_id = [255, 255]
-        data += [0, ]*(12-len(data)) + device_id
-        command_message = [Frame.HEADER.value, MessageType.COMMAND.value, command.value]
-        command_message += data
-        command_message.append(SDS011.calculate_checksum([command.value] + data))
-        command_message.append(Frame.TAIL.value)
-        self.last_command = bytes(command_message)
-        if not self.command_message_valid():
-            self.last_command = None
-
-    def __polling_for_reply(self) -> None:
+        """ Get command for device control """
+        self.last_command = SDS011.command_frame(command, data, device_id)
+
+    def __polling_for_reply(self, deadline: float) -> None:
         """ Read messages from device until reply for the last command is received """
-        for _ in range(10):
-            self.read_message()
-            if (self.last_reply[2] == self.last_command[2] or
-                (self.last_command[2] == Command.QUERY_DATA.value and
-                 self.last_reply[1] == MessageType.DATA.value)):
-                break
+        if self.last_command[2] == Command.QUERY_DATA.value:
+            read = self.read_message
         else:
-            raise TimeoutError('No reply received from sensor!')
+            read = self.read_reply
+        try:
+            read(deadline)
+            while not SDS011.is_reply_for(self.last_command, self.last_reply):
+                if self.metrics is not None:
+                    self.metrics.unmatched_frames += 1
+                read(deadline)
+        except TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise TimeoutError('No reply received from sensor!') from None
 
-    def __write_and_wait_reply(self) -> None:
-        """ Send command to device and wait for reply """
+    def __write_and_wait_reply(self, timeout: float = None) -> None:
+        """ Send command to device and wait for reply at most timeout seconds """
         if self.last_command:
+            if self.handshake_pending and self.last_command[2] != Command.GET_FIRMWARE.value:
+                command_message = self.last_command
+                self.handshake(timeout)
+                self.last_command = command_message
+            self.reader.reset()
+            start = time.monotonic()
+            deadline = start + (self.timeout if timeout is None else timeout)
             self.serial.write(self.last_command)
-            self.__polling_for_reply()
+            self.__polling_for_reply(deadline)
+            if self.metrics is not None:
+                self.metrics.observe_command(Command(self.last_command[2]),
+                                             time.monotonic() - start)
 
     def set_report_mode(self, report_mode: ReportMode,
-                        device_id: List[int] = None) -> None:
+                        device_id: List[int] = None, timeout: float = None) -> None:
         """ Set report mode """
         self.__prepare_command(command=Command.REPORT_MODE,
                                data=[Modifier.SET.value, report_mode.value],
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
 
-    def get_report_mode(self, device_id: List[int] = None):
+    def get_report_mode(self, device_id: List[int] = None, timeout: float = None):
         """ Get report mode """
         self.__prepare_command(command=Command.REPORT_MODE,
                                data=[Modifier.GET.value],
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
 
-    def query_data(self, device_id: List[int] = None):
+    def query_data(self, device_id: List[int] = None, timeout: float = None):
         """ Query data from device """
         self.__prepare_command(command=Command.QUERY_DATA,
                                data=[0],
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
 
     def set_device_id(self, new_device_id: [int, int],
-                      device_id: List[int] = None) -> None:
+                      device_id: List[int] = None, timeout: float = None) -> None:
         """ Set device id """
         data = [0]*10 + new_device_id
         self.__prepare_command(command=Command.SET_DEVICE_ID,
                                data=data,
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
         self.__decode_device_id()
 
     def set_working_mode(self, working_mode: WorkingMode,
-                         device_id: List[int] = None) -> None:
+                         device_id: List[int] = None, timeout: float = None) -> None:
         """ Set working mode """
         self.__prepare_command(command=Command.WORKING_MODE,
                                data=[Modifier.SET.value, working_mode.value],
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
 
-    def get_working_mode(self, device_id: List[int] = None) -> None:
+    def get_working_mode(self, device_id: List[int] = None, timeout: float = None) -> None:
         """ Get working mode """
         self.__prepare_command(command=Command.WORKING_MODE,
                                data=[Modifier.GET.value],
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
 
-    def get_firmware_version(self, device_id: List[int] = None) -> None:
+    def get_firmware_version(self, device_id: List[int] = None, timeout: float = None) -> None:
         """ Get firmware version and decode firmware and device id"""
         self.__prepare_command(command=Command.GET_FIRMWARE,
                                data=[0],
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
         self.firmware = {'year': self.last_reply[3],
                          'month': self.last_reply[4],
                          'day': self.last_reply[5]}
         self.__decode_device_id()
+        if device_id is None:
+            # broadcast reply comes from the sensor on this port
+            self.handshake_pending = False
+            if self.device_cache is not None and self.port is not None:
+                self.device_cache.update(self.port, self.device_id, self.firmware)
 
     def set_working_period(self, working_period: int = 0,
-                           device_id: List[int] = None) -> None:
+                           device_id: List[int] = None, timeout: float = None) -> None:
         """ Set working period """
         # valid values 1 min to 30 min and 0 for continuous
         # work 30 seconds and sleep n*60-30 seconds】
@@ -198,11 +330,29 @@ class SDS011:
         self.__prepare_command(command=Command.WORKING_PERIOD,
                                data=[Modifier.SET.value, working_period],
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
 
-    def get_working_period(self, device_id: List[int] = None) -> None:
+    def get_working_period(self, device_id: List[int] = None, timeout: float = None) -> None:
         """ Get working mode """
         self.__prepare_command(command=Command.WORKING_PERIOD,
                                data=[Modifier.GET.value],
                                device_id=device_id)
-        self.__write_and_wait_reply()
+        self.__write_and_wait_reply(timeout)
+
+
+def _prebuild_command_cache() -> None:
+    """ Build the broadcast frames of all commands with fixed parameters """
+    SDS011.command_frame(Command.REPORT_MODE, [Modifier.GET.value])
+    SDS011.command_frame(Command.WORKING_MODE, [Modifier.GET.value])
+    SDS011.command_frame(Command.WORKING_PERIOD, [Modifier.GET.value])
+    for report_mode in ReportMode:
+        SDS011.command_frame(Command.REPORT_MODE, [Modifier.SET.value, report_mode.value])
+    for working_mode in WorkingMode:
+        SDS011.command_frame(Command.WORKING_MODE, [Modifier.SET.value, working_mode.value])
+    for working_period in range(31):
+        SDS011.command_frame(Command.WORKING_PERIOD, [Modifier.SET.value, working_period])
+    SDS011.command_frame(Command.QUERY_DATA, [0])
+    SDS011.command_frame(Command.GET_FIRMWARE, [0])
+
+
+_prebuild_command_cache()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+""" Simulated SDS011 sensors behind pseudo-terminals (POSIX only)
+
+Every sensor gets a pty pair, clients open the slave path (e.g. /dev/pts/5)
+with pyserial like a real port. One thread serves all masters: it answers
+commands with the SimulationSDS011 logic and sends data frames in active
+report mode every interval seconds, paced to the baud rate.
+"""
+
+import os
+import selectors
+import threading
+import time
+import tty
+from collections import deque
+from typing import Deque, Dict, List, Sequence
+from ..definitions import ReportMode, WorkingMode
+from .. import codec
+from .sim_sds011 import SimulationSDS011
+
+# start, 8 data and stop bit
+BITS_PER_BYTE = 10
+
+
+class VirtualSensor:
+    """ One simulated sensor and its pty pair """
+
+    def __init__(self, simulation: SimulationSDS011, interval: float, baud: int):
+        self.simulation = simulation
+        self.interval = interval
+        self.byte_time = BITS_PER_BYTE / baud if baud else 0.0
+        self.master, self.slave = os.openpty()
+        # no echo or line editing, the slave end stays open so the master never sees EOF
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+        self.received = bytearray()
+        self.output: Deque[bytes] = deque()
+        self.busy_until = 0.0
+        self.next_frame = 0.0
+        self.frames_sent = 0
+        self.replies_sent = 0
+        self.commands = 0
+        self.dropped = 0
+
+    def close(self) -> None:
+        """ Close both pty ends """
+        os.close(self.master)
+        os.close(self.slave)
+
+    def receive(self) -> None:
+        """ Read written bytes and queue replies of all complete commands """
+        try:
+            self.received += os.read(self.master, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        received = self.received
+        while True:
+            start = received.find(bytes((codec.HEADER, codec.COMMAND)))
+            if start < 0:
+                # keep a possible header byte at the end
+                del received[:max(0, len(received) - 1)]
+                return
+            if len(received) - start < codec.COMMAND_LENGTH:
+                del received[:start]
+                return
+            command = bytes(received[start:start + codec.COMMAND_LENGTH])
+            if not codec.command_valid(command):
+                del received[:start + 1]
+                continue
+            del received[:start + codec.COMMAND_LENGTH]
+            self.commands += 1
+            simulation = self.simulation
+            simulation.command = command
+            simulation.build_reply()
+            if simulation.reply:
+                self.output.append(simulation.reply)
+                self.replies_sent += 1
+
+    def active(self) -> bool:
+        """ True if the sensor sends data frames by itself """
+        simulation = self.simulation
+        return (simulation.report_mode == ReportMode.REPORT_ACTIVE_MODE and
+                simulation.working_mode == WorkingMode.WORK_MODE)
+
+    def data_frame(self) -> bytes:
+        """ Active mode data frame """
+        simulation = self.simulation
+        return codec.pack_reply(codec.DATA, simulation.measurement_data + simulation.device_id)
+
+    def transmit(self, now: float) -> float:
+        """ Write queued frames the line can carry by now, return time of the next event """
+        if self.interval and now >= self.next_frame:
+            if self.active():
+                self.output.append(self.data_frame())
+                self.frames_sent += 1
+            # planned times keep the rate, a late loop does not send bursts
+            self.next_frame = max(self.next_frame + self.interval, now - self.interval)
+        while self.output and self.busy_until <= now:
+            frame = self.output.popleft()
+            try:
+                written = os.write(self.master, frame)
+            except BlockingIOError:
+                # nobody reads the slave and the pty buffer is full
+                self.dropped += 1
+                continue
+            if written < len(frame):
+                self.output.appendleft(frame[written:])
+            self.busy_until = max(self.busy_until, now) + len(frame) * self.byte_time
+        next_event = self.next_frame if self.interval else float('inf')
+        if self.output:
+            next_event = min(next_event, self.busy_until)
+        return next_event
+
+    def stats(self) -> Dict[str, int]:
+        """ Counters of the sensor """
+        return {'frames_sent': self.frames_sent, 'replies_sent': self.replies_sent,
+                'commands': self.commands, 'dropped': self.dropped}
+
+
+class PTYFarm:
+    """ Many simulated sensors on pseudo-terminals, served by one thread.
+
+    interval is the time between active mode data frames (0 disables them),
+    baud paces all output like the real line (0 disables pacing). Sensors
+    get device ids from device_ids or numbered [index >> 8, index & 0xFF].
+    """
+
+    def __init__(self, count: int, interval: float = 1.0, baud: int = 9600,
+                 device_ids: Sequence[Sequence[int]] = None):
+        self.interval = interval
+        self.sensors: List[VirtualSensor] = []
+        self.selector = selectors.DefaultSelector()
+        self.stop_event = threading.Event()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name='SDS011PTYFarm', daemon=True)
+        try:
+            for index in range(count):
+                simulation = SimulationSDS011()
+                simulation.device_id = (list(device_ids[index]) if device_ids
+                                        else [index >> 8 & 0xFF, index & 0xFF])
+                sensor = VirtualSensor(simulation, interval, baud)
+                self.sensors.append(sensor)
+                self.selector.register(sensor.master, selectors.EVENT_READ, sensor)
+        except OSError:
+            self.close()
+            raise
+
+    @property
+    def ports(self) -> List[str]:
+        """ Slave paths to open with pyserial """
+        return [sensor.port for sensor in self.sensors]
+
+    def start(self) -> 'PTYFarm':
+        """ Start serving thread, data frames of the sensors are staggered """
+        now = time.monotonic()
+        for index, sensor in enumerate(self.sensors):
+            sensor.next_frame = now + self.interval * index / max(len(self.sensors), 1)
+        self.thread.start()
+        return self
+
+    def run(self) -> None:
+        """ Serve all sensors until stopped """
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            next_event = now + 0.1
+            for sensor in self.sensors:
+                next_event = min(next_event, sensor.transmit(now))
+            for key, _ in self.selector.select(max(0.0, next_event - time.monotonic())):
+                sensor = key.data
+                sensor.receive()
+                sensor.transmit(time.monotonic())
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """ Stop serving thread and close all ptys """
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+        self.close()
+
+    def close(self) -> None:
+        """ Close all ptys """
+        if self.closed:
+            return
+        self.closed = True
+        for sensor in self.sensors:
+            self.selector.unregister(sensor.master)
+            sensor.close()
+        self.selector.close()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """ Counters by port """
+        return {sensor.port: sensor.stats() for sensor in self.sensors}
+
+    def __enter__(self) -> 'PTYFarm':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
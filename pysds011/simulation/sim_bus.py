@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+""" Simulation for several SDS011 sensors sharing one serial line """
+
+from typing import List
+from .sim_sds011 import SimulationSDS011
+
+COMMAND_LENGTH = 19
+
+
+class SimulationBus:
+    """ Serial line with several simulated SDS011 sensors.
+
+    Every command written is passed to all sensors, replies are queued in
+    the order the commands were written. read() returns b'' when no reply
+    is pending, like serial.Serial().read() after a timeout.
+    """
+
+    def __init__(self, simulations: List[SimulationSDS011]):
+        self.simulations = simulations
+        self.data = bytearray()
+
+    @property
+    def in_waiting(self) -> int:
+        """ Number of bytes pending """
+        return len(self.data)
+
+    def read(self, size: int = 1) -> bytes:
+        """ Return up to size pending bytes """
+        read_buffer = bytes(self.data[:size])
+        del self.data[:size]
+        return read_buffer
+
+    def write(self, data) -> int:
+        """ Pass every command to all sensors and queue their replies """
+        for i in range(0, len(data), COMMAND_LENGTH):
+            command = bytes(data[i:i + COMMAND_LENGTH])
+            for simulation in self.simulations:
+                simulation.write(command)
+                if simulation.reply:
+                    self.data += simulation.reply
+        return len(data)
+
+    def flushInput(self) -> None:
+        """ Drop pending bytes like serial.Serial().flushInput() """
+        del self.data[:]
+
+    def close(self) -> None:
+        """ Dummy for function in serial.Serial().close() """
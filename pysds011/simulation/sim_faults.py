@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+""" Seeded fault injection for simulated serial lines """
+
+import math
+import random
+import time
+from typing import Callable, List, Tuple
+from .. import codec
+
+BIT_FLIP = 0
+DROP = 1
+DUPLICATE = 2
+GARBAGE = 3
+
+
+class FaultInjector:
+    """ Corrupts the byte stream and withholds command replies of a simulation.
+
+    Rates are probabilities per byte read: a bit flip, a dropped byte, a
+    duplicated byte or a burst of garbage_length random bytes inserted in
+    front of it. Garbage bytes are header bytes (0xAA) with probability
+    header_bias to provoke false resyncs. COMMAND_REPLY frames go missing
+    with reply_drop_rate or arrive reply_delay seconds late with
+    reply_delay_rate. The same seed and reads give the same faults.
+    """
+
+    def __init__(self, seed: int = None, bit_flip_rate: float = 0.0, drop_rate: float = 0.0,
+                 duplicate_rate: float = 0.0, garbage_rate: float = 0.0,
+                 garbage_length: Tuple[int, int] = (1, 32), header_bias: float = 0.25,
+                 reply_drop_rate: float = 0.0, reply_delay_rate: float = 0.0,
+                 reply_delay: Tuple[float, float] = (0.1, 0.5),
+                 clock: Callable[[], float] = time.monotonic):
+        self.random = random.Random(seed)
+        self.weights = (bit_flip_rate, drop_rate, duplicate_rate, garbage_rate)
+        self.rate = sum(self.weights)
+        assert self.rate <= 1
+        self.garbage_length = garbage_length
+        self.header_bias = header_bias
+        self.reply_drop_rate = reply_drop_rate
+        self.reply_delay_rate = reply_delay_rate
+        self.reply_delay = reply_delay
+        self.clock = clock
+        self.pending: List[Tuple[float, bytes]] = []
+        self.until_fault = self.__gap()
+        self.bit_flips = 0
+        self.dropped_bytes = 0
+        self.duplicated_bytes = 0
+        self.garbage_bytes = 0
+        self.dropped_replies = 0
+        self.delayed_replies = 0
+
+    def __gap(self) -> float:
+        """ Number of clean bytes before the next fault (geometric distribution) """
+        if self.rate <= 0:
+            return math.inf
+        if self.rate >= 1:
+            return 0
+        return int(math.log(1.0 - self.random.random()) / math.log(1.0 - self.rate))
+
+    def __garbage(self) -> bytes:
+        """ Random burst with stray header bytes """
+        rand = self.random
+        burst = bytes(codec.HEADER if rand.random() < self.header_bias else rand.randrange(256)
+                      for _ in range(rand.randint(*self.garbage_length)))
+        self.garbage_bytes += len(burst)
+        return burst
+
+    def corrupt(self, chunk: bytes) -> bytes:
+        """ Return chunk with byte faults applied """
+        length = len(chunk)
+        if self.until_fault >= length:
+            self.until_fault -= length
+            return chunk
+        output = bytearray()
+        start = 0
+        while start + self.until_fault < length:
+            position = start + self.until_fault
+            output += chunk[start:position]
+            byte = chunk[position]
+            fault = self.random.choices((BIT_FLIP, DROP, DUPLICATE, GARBAGE), self.weights)[0]
+            if fault == BIT_FLIP:
+                output.append(byte ^ (1 << self.random.randrange(8)))
+                self.bit_flips += 1
+            elif fault == DROP:
+                self.dropped_bytes += 1
+            elif fault == DUPLICATE:
+                output += bytes((byte, byte))
+                self.duplicated_bytes += 1
+            else:
+                output += self.__garbage()
+                output.append(byte)
+            start = position + 1
+            self.until_fault = self.__gap()
+        self.until_fault -= length - start
+        output += chunk[start:]
+        return bytes(output)
+
+    def replies(self, replies: bytes) -> bytes:
+        """ Return replies sent now, drop or hold back COMMAND_REPLY frames """
+        now = self.clock()
+        immediate = []
+        for start in range(0, len(replies), codec.REPLY_LENGTH):
+            reply = replies[start:start + codec.REPLY_LENGTH]
+            if reply[1] == codec.COMMAND_REPLY:
+                draw = self.random.random()
+                if draw < self.reply_drop_rate:
+                    self.dropped_replies += 1
+                    continue
+                if draw < self.reply_drop_rate + self.reply_delay_rate:
+                    self.pending.append((now + self.random.uniform(*self.reply_delay), reply))
+                    self.delayed_replies += 1
+                    continue
+            immediate.append(reply)
+        return b''.join(immediate)
+
+    def release(self) -> bytes:
+        """ Return delayed replies that are due """
+        if not self.pending:
+            return b''
+        now = self.clock()
+        due = [reply for release, reply in self.pending if release <= now]
+        if due:
+            self.pending = [(release, reply) for release, reply in self.pending
+                            if release > now]
+        return b''.join(due)
+
+    def stats(self) -> dict:
+        """ Counters of injected faults """
+        return {'bit_flips': self.bit_flips, 'dropped_bytes': self.dropped_bytes,
+                'duplicated_bytes': self.duplicated_bytes, 'garbage_bytes': self.garbage_bytes,
+                'dropped_replies': self.dropped_replies, 'delayed_replies': self.delayed_replies}
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+""" Synthetic SDS011 data frame streams from waveforms
+
+Frames of all devices are interleaved: frame number n belongs to device
+n % len(device_ids) at time (n // len(device_ids)) * interval. With numpy
+installed frames are built vectorized, otherwise one by one.
+"""
+
+import math
+import random
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple, Union
+from .. import codec
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# measuring range of the sensor is 0.0 - 999.9 ug/m^3
+MAX_VALUE = 9999
+
+
+class Waveform:
+    """ PM2.5 course over time in ug/m^3, PM10 is PM2.5 * pm10_ratio.
+
+    base plus a diurnal sine (amplitude, period and phase in seconds),
+    gaussian noise with standard deviation noise and step events given as
+    (start, duration, delta) in seconds and ug/m^3.
+    """
+
+    def __init__(self, base: float = 15.0, amplitude: float = 10.0, period: float = 86400.0,
+                 phase: float = 0.0, noise: float = 1.0, pm10_ratio: float = 1.6,
+                 steps: Sequence[Tuple[float, float, float]] = ()):
+        self.base = base
+        self.amplitude = amplitude
+        self.period = period
+        self.phase = phase
+        self.noise = noise
+        self.pm10_ratio = pm10_ratio
+        self.steps = list(steps)
+
+    def value(self, time: float) -> float:
+        """ PM2.5 without noise at time """
+        value = self.base + self.amplitude * math.sin(2 * math.pi * (time + self.phase)
+                                                      / self.period)
+        for start, duration, delta in self.steps:
+            if start <= time < start + duration:
+                value += delta
+        return value
+
+    def values(self, times):
+        """ PM2.5 without noise at times (numpy array) """
+        values = self.base + self.amplitude * np.sin(2 * np.pi * (times + self.phase)
+                                                     / self.period)
+        for start, duration, delta in self.steps:
+            values += np.where((times >= start) & (times < start + duration), delta, 0.0)
+        return values
+
+
+class FrameGenerator:
+    """ Endless stream of valid data frames of many devices.
+
+    Every device gets its own waveform from waveforms (cycled) with a
+    random diurnal phase shift, so devices differ. seed makes the stream
+    reproducible for the same sequence of generate() calls.
+    """
+
+    def __init__(self, device_ids: Sequence[Sequence[int]] = ((10, 11),),
+                 waveforms: Sequence[Waveform] = (Waveform(),), interval: float = 1.0,
+                 seed: int = None):
+        assert device_ids and waveforms and interval > 0
+        self.device_ids = [bytes(device_id) for device_id in device_ids]
+        self.interval = interval
+        self.random = random.Random(seed)
+        self.waveforms: List[Waveform] = []
+        for index in range(len(self.device_ids)):
+            waveform = waveforms[index % len(waveforms)]
+            self.waveforms.append(Waveform(
+                waveform.base, waveform.amplitude, waveform.period,
+                waveform.phase + self.random.uniform(0, waveform.period / 24),
+                waveform.noise, waveform.pm10_ratio, waveform.steps))
+        self.numpy_random = np.random.default_rng(seed) if np is not None else None
+        self.frame_number = 0
+
+    def __raw_values(self, start: int, count: int) -> Tuple[List[int], List[int]]:
+        """ Raw PM2.5 and PM10 of frames start .. start + count without numpy """
+        devices = len(self.device_ids)
+        pm25, pm10 = [], []
+        for number in range(start, start + count):
+            waveform = self.waveforms[number % devices]
+            value = waveform.value(number // devices * self.interval)
+            value += self.random.gauss(0.0, waveform.noise) if waveform.noise else 0.0
+            pm25.append(min(max(int(round(value * 10)), 0), MAX_VALUE))
+            pm10.append(min(max(int(round(value * waveform.pm10_ratio * 10)), 0), MAX_VALUE))
+        return pm25, pm10
+
+    def __frames_numpy(self, start: int, count: int) -> bytes:
+        """ Frames start .. start + count built as one array """
+        devices = len(self.device_ids)
+        numbers = np.arange(start, start + count, dtype=np.int64)
+        device = numbers % devices
+        times = (numbers // devices) * self.interval
+        pm25 = np.empty(count)
+        pm10 = np.empty(count)
+        for index, waveform in enumerate(self.waveforms):
+            # frames of one device are every devices-th frame
+            first = (index - start) % devices
+            selection = slice(first, count, devices)
+            values = waveform.values(times[selection])
+            if waveform.noise:
+                values += self.numpy_random.normal(0.0, waveform.noise, len(values))
+            pm25[selection] = values
+            pm10[selection] = values * waveform.pm10_ratio
+        pm25 = np.clip(np.rint(pm25 * 10), 0, MAX_VALUE).astype(np.uint16)
+        pm10 = np.clip(np.rint(pm10 * 10), 0, MAX_VALUE).astype(np.uint16)
+        ids = np.frombuffer(b''.join(self.device_ids), dtype=np.uint8).reshape(devices, 2)
+
+        frames = np.empty((count, codec.REPLY_LENGTH), dtype=np.uint8)
+        frames[:, 0] = codec.HEADER
+        frames[:, 1] = codec.DATA
+        frames[:, 2] = pm25 & 0xFF
+        frames[:, 3] = pm25 >> 8
+        frames[:, 4] = pm10 & 0xFF
+        frames[:, 5] = pm10 >> 8
+        frames[:, 6:8] = ids[device]
+        frames[:, 8] = frames[:, 2:8].sum(axis=1, dtype=np.uint32) % 256
+        frames[:, 9] = codec.TAIL
+        return frames.tobytes()
+
+    def generate(self, count: int) -> bytes:
+        """ Next count frames of the stream """
+        start = self.frame_number
+        self.frame_number += count
+        if np is not None:
+            return self.__frames_numpy(start, count)
+        devices = len(self.device_ids)
+        pm25, pm10 = self.__raw_values(start, count)
+        return b''.join(codec.pack_data(pm25[index], pm10[index],
+                                        self.device_ids[(start + index) % devices])
+                        for index in range(count))
+
+    def chunks(self, frames: int, chunk_frames: int = 1 << 16) -> Iterator[bytes]:
+        """ Yield next frames in chunks of at most chunk_frames """
+        while frames > 0:
+            count = min(frames, chunk_frames)
+            frames -= count
+            yield self.generate(count)
+
+    def write_file(self, path: Union[str, Path], frames: int,
+                   chunk_frames: int = 1 << 16) -> int:
+        """ Write next frames to a capture file, return number of bytes written """
+        written = 0
+        with open(path, 'wb') as file:
+            for chunk in self.chunks(frames, chunk_frames):
+                written += file.write(chunk)
+        return written
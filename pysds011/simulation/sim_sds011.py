@@ -2,9 +2,10 @@
 
 """ Simulation for serial connection with connected SDS011 sensor """
 
+import mmap
 from pathlib import Path
-from ..definitions import WorkingMode, ReportMode, Modifier, Frame, Command, MessageType
-from ..sds011 import SDS011
+from ..definitions import WorkingMode, ReportMode, Modifier, Command
+from .. import codec
 
 
 class SimulationSDS011:
@@ -24,54 +25,136 @@ class SimulationSDS011:
                                       / 'data/sample_data_sds011.hex')
         self.data = bytearray()
         self.offset = 0
+        self.mapped_data = None
+        self.generator = None
+        self.chunk_frames = 0
+        self.faults = None
+        self.corrupted = bytearray()
 
         self.command = None
         self.reply = None
 
+    @property
+    def in_waiting(self) -> int:
+        """ Generated bytes not read yet, 0 without generator like before """
+        if self.generator is None:
+            return 0
+        return max(len(self.data) - self.offset, 0)
+
     def read(self, size: int = 1) -> bytes:
-        """ Returns bytes from self.data bytes buffer """
-        read_buffer = bytearray()
-        for _ in range(size):
-            # reset offset on last data element
-            if self.offset >= len(self.data):
-                self.offset = 0
-            read_buffer.append(self.data[self.offset])
-            self.offset += 1
+        """ Returns bytes from self.data bytes buffer, wraps around at the end """
+        if self.faults is not None:
+            return self.__read_faulty(size)
+        return self.__read_data(size)
+
+    def __read_faulty(self, size: int) -> bytes:
+        """ Returns size bytes of the data stream with faults injected """
+        released = self.faults.release()
+        if released:
+            self.data = released
+            self.offset = 0
+        corrupted = self.corrupted
+        while len(corrupted) < size:
+            chunk = self.__read_data(size)
+            if not chunk:
+                break
+            corrupted += self.faults.corrupt(chunk)
+        read_buffer = bytes(corrupted[:size])
+        del corrupted[:size]
         return read_buffer
 
+    def __read_data(self, size: int) -> bytes:
+        """ Returns bytes from self.data or the generator """
+        if self.generator is not None:
+            return self.__read_generated(size)
+        data = self.data
+        length = len(data)
+        if not length:
+            return b''
+        # reset offset on last data element
+        if self.offset >= length:
+            self.offset = 0
+        end = self.offset + size
+        if end <= length:
+            self.offset = end
+            return data[end - size:end]
+        read_buffer = [data[self.offset:]]
+        size -= length - self.offset
+        while size > length:
+            read_buffer.append(data[:])
+            size -= length
+        read_buffer.append(data[:size])
+        self.offset = size
+        return b''.join(read_buffer)
+
+    def __read_generated(self, size: int) -> bytes:
+        """ Returns bytes from self.data, refilled from the generator when used up """
+        offset = self.offset
+        end = offset + size
+        if end > len(self.data):
+            chunks = [self.data[offset:]]
+            available = len(self.data) - offset
+            while available < size:
+                chunk = self.generator.generate(self.chunk_frames)
+                chunks.append(chunk)
+                available += len(chunk)
+            self.data = b''.join(chunks)
+            offset, end = 0, size
+        self.offset = end
+        return self.data[offset:end]
+
+    def use_generator(self, generator, chunk_frames: int = 4096) -> None:
+        """ Serve frames of a FrameGenerator with read(), None restores self.data """
+        self.close()
+        self.generator = generator
+        self.chunk_frames = chunk_frames
+        self.data = b''
+        self.offset = 0
+
+    def use_faults(self, faults) -> None:
+        """ Inject faults of a FaultInjector into read() and replies, None disables """
+        self.faults = faults
+        del self.corrupted[:]
+
     def flushInput(self) -> None:
         """ Dummy for function in serial.Serial().flushInput() """
 
     def close(self) -> None:
-        """ Dummy for function in serial.Serial().close() """
-
-    def read_sample_data_sds011(self) -> None:
-        """ Load sample data from file """
-        file = open(self.path_to_sample_binary, 'rb')
-        data = file.read()
-        file.close()
-        self.data = data
+        """ Release memory mapped sample data like serial.Serial().close() """
+        if self.mapped_data is not None:
+            self.mapped_data.close()
+            self.mapped_data = None
+        self.generator = None
+        self.chunk_frames = 0
+        self.faults = None
+        self.corrupted = bytearray()
+
+    def read_sample_data_sds011(self, path: Path = None) -> None:
+        """ Memory map sample data from file (default: data/sample_data_sds011.hex) """
+        if path is None:
+            path = self.path_to_sample_binary
+        self.close()
+        self.generator = None
+        self.offset = 0
+        if Path(path).stat().st_size == 0:
+            self.data = b''
+            return
+        with open(path, 'rb') as file:
+            self.mapped_data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = self.mapped_data
 
     def command_message_valid(self) -> bool:
         """ Validate received command """
-        if len(self.command) == 19:
-            if (self.command[0] == Frame.HEADER.value and
-                    self.command[1] == MessageType.COMMAND.value and
-                    self.command[-1] == Frame.TAIL.value):
-                message_data = []
-                for i in range(len(self.command[2:-2])):
-                    message_data.append(self.command[2+i])
-                if SDS011.calculate_checksum(message_data) == self.command[-2]:
-                    if (self.command[-4:-2] == bytes([255, 255]) or
-                            self.command[-4:-2] == bytes(self.device_id)):
-                        return True
+        if codec.command_valid(self.command):
+            device_id = codec.unpack_command(self.command)[2]
+            return device_id == codec.BROADCAST_ID or device_id == bytes(self.device_id)
         return False
 
     def build_reply(self) -> None:
         """ Build reply for received command """
         if self.command_message_valid():
             data = [self.command[2]]
-            command_type = MessageType.COMMAND_REPLY
+            command_type = codec.COMMAND_REPLY
 
             if self.command[2] == Command.WORKING_MODE.value:
                 if self.command[3] == Modifier.SET.value:
@@ -102,23 +185,33 @@ class SimulationSDS011:
                 data = data[:-1] + self.firmware
 
             if self.command[2] == Command.QUERY_DATA.value:
-                command_type = MessageType.DATA
+                command_type = codec.DATA
                 data = data[:-2] + self.measurement_data
 
-            data += self.device_id
-
-            reply = [Frame.HEADER.value, command_type.value]
-            reply += data
-            reply.append(SDS011.calculate_checksum(data))
-            reply.append(Frame.TAIL.value)
-
-            self.reply = bytes(reply)
-            self.data = self.reply
+            data += [0] * (4 - len(data))
+            self.reply = codec.pack_reply(command_type, data + self.device_id)
         else:
             self.reply = None
 
     def write(self, data) -> int:
-        """ Receive and process commands like serial.Serial().write()"""
-        self.command = data
-        self.build_reply()
+        """ Receive and process commands like serial.Serial().write()
+
+        Several commands written at once are answered in order.
+        """
+        commands = [data]
+        if len(data) > 19 and len(data) % 19 == 0:
+            commands = [data[i:i + 19] for i in range(0, len(data), 19)]
+        replies = b''
+        for command in commands:
+            self.command = command
+            self.build_reply()
+            if self.reply:
+                replies += self.reply
+        if replies:
+            if self.faults is not None:
+                # withheld replies leave the line silent
+                replies = self.faults.replies(replies)
+                del self.corrupted[:]
+            self.data = replies
+            self.offset = 0
         return len(data)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+""" asyncio stream wrapper for SimulationSDS011 """
+
+import asyncio
+from .sim_sds011 import SimulationSDS011
+
+
+class SimulationStream:
+    """ Provides the StreamReader/StreamWriter API used by AsyncSDS011 """
+
+    def __init__(self, simulation: SimulationSDS011, chunk_size: int = 10):
+        self.simulation = simulation
+        self.chunk_size = chunk_size
+        self.closed = False
+
+    async def read(self, n: int = -1) -> bytes:
+        """ Return up to n bytes from the simulation """
+        await asyncio.sleep(0)
+        if self.closed:
+            return b''
+        if n < 0:
+            n = self.chunk_size
+        return bytes(self.simulation.read(min(n, self.chunk_size)))
+
+    def write(self, data) -> None:
+        """ Pass command to the simulation """
+        self.simulation.write(bytes(data))
+
+    async def drain(self) -> None:
+        """ Nothing to flush """
+
+    def close(self) -> None:
+        """ Close stream """
+        self.closed = True
+        self.simulation.close()
+
+    async def wait_closed(self) -> None:
+        """ Nothing to wait for """
+
+
+def open_simulation(simulation: SimulationSDS011 = None):
+    """ Return (reader, writer) pair for a simulation """
+    if simulation is None:
+        simulation = SimulationSDS011()
+    stream = SimulationStream(simulation)
+    return stream, stream
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+""" Constant memory streaming statistics of measurements
+
+Values are raw measurements in 0.1 ug/m^3 units like in MeasurementHistory,
+results are returned in ug/m^3.
+"""
+
+import math
+import struct
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+from . import codec
+
+SKETCH_HEADER = struct.Struct('<4sdIQ')
+SKETCH_MAGIC = b'SDSQ'
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RunningStats:
+    """ Count, mean, variance, min and max (Welford), mergeable (Chan et al.) """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """ Add value """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'RunningStats') -> None:
+        """ Add values of other """
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """ Sample variance """
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class EWMA:
+    """ Exponentially weighted moving average with weight alpha of the newest value """
+
+    def __init__(self, alpha: float = 0.1):
+        assert 0 < alpha <= 1
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    @classmethod
+    def from_halflife(cls, samples: float) -> 'EWMA':
+        """ EWMA where a value loses half its weight after samples values """
+        return cls(1 - 0.5 ** (1 / samples))
+
+    def add(self, value: float) -> None:
+        """ Add value """
+        if self.value is None:
+            self.value = float(value)
+        else:
+            self.value += self.alpha * (value - self.value)
+
+
+class QuantileSketch:
+    """ Mergeable quantile sketch for integer values with bounded relative error.
+
+    Values are counted in logarithmic buckets (like DDSketch), so every
+    quantile is within relative_accuracy of a value of the stream. Memory is
+    fixed by relative_accuracy and max_value, merging adds bucket counts.
+    Buckets of all values up to max_value are looked up in a table shared by
+    sketches with the same parameters.
+    """
+
+    tables: Dict[Tuple[float, int], Tuple[array, List[float]]] = {}
+
+    def __init__(self, relative_accuracy: float = 0.01, max_value: int = 0xFFFF):
+        assert 0 < relative_accuracy < 1 and max_value >= 1
+        self.relative_accuracy = relative_accuracy
+        self.max_value = max_value
+        self.table, self.estimates = QuantileSketch.__table(relative_accuracy, max_value)
+        self.counts = array('Q', bytes(8 * len(self.estimates)))
+        self.count = 0
+
+    @staticmethod
+    def __table(relative_accuracy: float, max_value: int) -> Tuple[array, List[float]]:
+        """ Bucket of every value and value estimate of every bucket """
+        key = (relative_accuracy, max_value)
+        if key not in QuantileSketch.tables:
+            gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+            log_gamma = math.log(gamma)
+            # bucket 0 holds the value 0, bucket i > 0 holds (gamma^(i-2), gamma^(i-1)]
+            indices = [0] + [math.ceil(math.log(value) / log_gamma - 1e-9) + 1
+                             for value in range(1, max_value + 1)]
+            estimates = [0.0] + [2 * gamma ** (index - 1) / (gamma + 1)
+                                 for index in range(1, indices[-1] + 1)]
+            QuantileSketch.tables[key] = (array('H' if indices[-1] < 0xFFFF else 'L', indices),
+                                          estimates)
+        return QuantileSketch.tables[key]
+
+    def add(self, value: int, count: int = 1) -> None:
+        """ Add integer value (clamped to 0..max_value) """
+        if value > self.max_value:
+            value = self.max_value
+        elif value < 0:
+            value = 0
+        self.counts[self.table[value]] += count
+        self.count += count
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """ Add counts of other sketch with the same parameters """
+        if (other.relative_accuracy, other.max_value) != (self.relative_accuracy,
+                                                           self.max_value):
+            raise ValueError('Sketch parameters differ!')
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """ Estimate of the q quantile (0 <= q <= 1), None if empty """
+        assert 0 <= q <= 1
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        total = 0
+        for index, count in enumerate(self.counts):
+            total += count
+            if total > rank:
+                return self.estimates[index]
+        return self.estimates[-1]
+
+    def to_bytes(self) -> bytes:
+        """ Serialize sketch, e.g. to merge sketches of other processes or days """
+        return (SKETCH_HEADER.pack(SKETCH_MAGIC, self.relative_accuracy, self.max_value,
+                                   self.count) + self.counts.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'QuantileSketch':
+        """ Restore serialized sketch """
+        magic, relative_accuracy, max_value, count = SKETCH_HEADER.unpack_from(data)
+        if magic != SKETCH_MAGIC:
+            raise ValueError('Not a quantile sketch!')
+        sketch = cls(relative_accuracy, max_value)
+        counts = array('Q')
+        counts.frombytes(data[SKETCH_HEADER.size:])
+        if len(counts) != len(sketch.counts):
+            raise ValueError('Sketch size does not match its parameters!')
+        sketch.counts = counts
+        sketch.count = count
+        return sketch
+
+
+class ChannelStatistics:
+    """ EWMA, running statistics and quantile sketch of one channel """
+
+    def __init__(self, alpha: float = 0.1, relative_accuracy: float = 0.01):
+        self.ewma = EWMA(alpha)
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value: int) -> None:
+        """ Add raw value """
+        self.ewma.add(value)
+        self.stats.add(value)
+        self.sketch.add(value)
+
+    def merge(self, other: 'ChannelStatistics') -> None:
+        """ Add statistics of other, the EWMA of self is kept """
+        if self.ewma.value is None:
+            self.ewma.value = other.ewma.value
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """ Return statistics in ug/m^3 """
+        stats = self.stats
+        if not stats.count:
+            return {'count': 0}
+        summary = {'count': stats.count,
+                   'mean': stats.mean / 10,
+                   'stddev': math.sqrt(stats.variance) / 10,
+                   'min': stats.min / 10,
+                   'max': stats.max / 10,
+                   'ewma': self.ewma.value / 10}
+        for q in quantiles:
+            # estimates never leave the observed range
+            value = min(max(self.sketch.quantile(q), stats.min), stats.max)
+            summary['p%g' % (q * 100)] = value / 10
+        return summary
+
+
+class StreamStatistics:
+    """ Streaming statistics of PM2.5 and PM10 per device id.
+
+    Feed it raw values with add(), data frames with add_frame() or a sensor
+    after decode_data() with add_sensor(). Memory per device is constant.
+    Statistics of other processes or days are combined with merge().
+    """
+
+    CHANNELS = ('PM2.5', 'PM10')
+
+    def __init__(self, alpha: float = 0.1, relative_accuracy: float = 0.01):
+        self.alpha = alpha
+        self.relative_accuracy = relative_accuracy
+        self.devices: Dict[str, Tuple[ChannelStatistics, ChannelStatistics]] = {}
+
+    def __channels(self, device_id: str) -> Tuple[ChannelStatistics, ChannelStatistics]:
+        """ Statistics of device, created on first use """
+        channels = self.devices.get(device_id)
+        if channels is None:
+            channels = self.devices[device_id] = (
+                ChannelStatistics(self.alpha, self.relative_accuracy),
+                ChannelStatistics(self.alpha, self.relative_accuracy))
+        return channels
+
+    def add(self, device_id: str, pm25: int, pm10: int) -> None:
+        """ Add raw values (0.1 ug/m^3) of device """
+        pm25_channel, pm10_channel = self.__channels(device_id)
+        pm25_channel.add(pm25)
+        pm10_channel.add(pm10)
+
+    def add_frame(self, frame) -> None:
+        """ Add values of a data frame, devices are told apart by its device id """
+        pm25, pm10 = codec.unpack_pm(frame)
+        self.add(bytes(frame[6:8]).hex().upper(), pm25, pm10)
+
+    def add_measurement(self, measurement) -> None:
+        """ Add values of a Measurement """
+        self.add(measurement.get_device_id(), measurement.pm25_raw, measurement.pm10_raw)
+
+    def add_sensor(self, sensor) -> None:
+        """ Add last decoded data frame of a SDS011 """
+        if sensor.last_reply[1] == codec.DATA:
+            self.add_frame(sensor.last_reply)
+
+    def merge(self, other: 'StreamStatistics') -> None:
+        """ Add statistics of other """
+        for device_id, channels in other.devices.items():
+            for own, their in zip(self.__channels(device_id), channels):
+                own.merge(their)
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES
+                ) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """ Return statistics by device id and channel in ug/m^3 """
+        return {device_id: {name: channel.summary(quantiles)
+                            for name, channel in zip(StreamStatistics.CHANNELS, channels)}
+                for device_id, channels in self.devices.items()}
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+""" Test asyncio control for SDS011 sensor """
+
+import asyncio
+import unittest
+
+from pysds011.async_sds011 import AsyncSDS011
+from pysds011.definitions import WorkingMode, ReportMode, Command
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+from pysds011.simulation.sim_stream import open_simulation
+
+
+class StreamWriterDummy:
+    """ Writer collecting written bytes """
+    def __init__(self):
+        self.written = b''
+
+    def write(self, data) -> None:
+        self.written += data
+
+    async def drain(self) -> None:
+        pass
+
+
+class TestAsyncSDS011(unittest.TestCase):
+    """ Tests AsyncSDS011 class with SimulationSDS011 """
+
+    def setUp(self):
+        self.sensor_simulation = SimulationSDS011()
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_commands(self):
+        """ Awaitable commands change the simulated device """
+        async def run():
+            sensor = await AsyncSDS011.create(*open_simulation(self.sensor_simulation))
+            self.assertEqual(sensor.device_id, self.sensor_simulation.device_id)
+            await sensor.set_working_mode(WorkingMode.SLEEP_MODE)
+            self.assertEqual(self.sensor_simulation.working_mode, WorkingMode.SLEEP_MODE)
+            await sensor.set_report_mode(ReportMode.REPORT_QUERY_MODE)
+            self.assertEqual(self.sensor_simulation.report_mode, ReportMode.REPORT_QUERY_MODE)
+            await sensor.set_working_period(5)
+            await sensor.get_working_period()
+            self.assertEqual(sensor.last_reply[2], Command.WORKING_PERIOD.value)
+            self.assertEqual(sensor.last_reply[4], 5)
+            await sensor.query_data()
+            self.assertEqual(sensor.data, {'PM2.5': 3.4, 'PM10': 4.0})
+        self.run_async(run())
+
+    def test_measurement_stream(self):
+        """ async for yields decoded sample data """
+        async def run():
+            self.sensor_simulation.read_sample_data_sds011()
+            sensor = AsyncSDS011(*open_simulation(self.sensor_simulation))
+            values = []
+            async for data in sensor:
+                values.append(data)
+                if len(values) == 3:
+                    break
+            return values
+        values = self.run_async(run())
+        self.assertEqual(values[0], {'PM2.5': 3.4, 'PM10': 4.0})
+        self.assertEqual(values[2], {'PM2.5': 3.3, 'PM10': 4.0})
+
+    def test_stream_reader(self):
+        """ Works with asyncio.StreamReader """
+        async def run():
+            reader = asyncio.StreamReader()
+            writer = StreamWriterDummy()
+            sensor = AsyncSDS011(reader, writer)
+            reader.feed_data(b'\x00\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab')
+            await sensor.query_data()
+            self.assertEqual(writer.written[2], Command.QUERY_DATA.value)
+            with self.assertRaises(TimeoutError):
+                await sensor.get_working_mode(timeout=0.01)
+            reader.feed_eof()
+            with self.assertRaises(EOFError):
+                await sensor.read_message()
+            return sensor.data
+        self.assertEqual(self.run_async(run()), {'PM2.5': 3.4, 'PM10': 4.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+""" Test background reader thread """
+
+import time
+import unittest
+
+from pysds011.background import BackgroundReader
+from pysds011.definitions import ReportMode, WorkingMode, Command
+from pysds011.pipeline import CommandPipeline
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_bus import SimulationBus
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+DATA_FRAME = b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab'
+
+
+class TestBackgroundReader(unittest.TestCase):
+    """ Tests BackgroundReader class with SDS011 and a simulated line """
+
+    def setUp(self):
+        self.sensor_simulation = SimulationSDS011()
+        # SimulationBus delivers every reply once and then reads nothing
+        self.line = SimulationBus([self.sensor_simulation])
+        self.sensor = SDS011(self.line, background=True, timeout=1.0)
+
+    def tearDown(self):
+        self.sensor.reader.stop()
+
+    def test_commands_keep_measurements(self):
+        """ DATA frames received during commands are kept """
+        self.line.data += DATA_FRAME * 3
+        self.sensor.set_working_mode(WorkingMode.WORK_MODE)
+        self.line.data += DATA_FRAME
+        self.sensor.set_report_mode(ReportMode.REPORT_ACTIVE_MODE)
+        self.assertEqual(self.sensor.last_reply[2], Command.REPORT_MODE.value)
+        for _ in range(4):
+            self.sensor.read_and_decode_data(timeout=1.0)
+            self.assertEqual(self.sensor.data, {'PM2.5': 3.4, 'PM10': 4.0})
+        with self.assertRaises(TimeoutError):
+            self.sensor.read_and_decode_data(timeout=0.05)
+
+    def test_pipeline(self):
+        """ Pipelined commands get their replies from the reply queue """
+        self.line.data += DATA_FRAME
+        pipeline = CommandPipeline(self.sensor)
+        replies = pipeline.get_working_period().query_data().get_report_mode().execute()
+        self.assertEqual([reply[2] for reply in replies],
+                         [Command.WORKING_PERIOD.value, 34, Command.REPORT_MODE.value])
+
+    def test_bounded_queue(self):
+        """ Oldest measurements are dropped when the queue is full """
+        reader = BackgroundReader(SimulationBus([]), max_measurements=2)
+        reader.frame_reader.parser.feed(DATA_FRAME * 5)
+        reader.start()
+        deadline = time.monotonic() + 1.0
+        while reader.dropped_measurements < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        reader.stop()
+        self.assertEqual(reader.dropped_measurements, 3)
+        self.assertEqual(reader.read_frame(), DATA_FRAME)
+        self.assertEqual(reader.read_frame(), DATA_FRAME)
+        with self.assertRaises(EOFError):
+            reader.read_frame()
+
+
+if __name__ == '__main__':
+    unittest.main()
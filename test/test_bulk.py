@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+""" Test vectorized bulk decoder """
+
+import unittest
+import pytest
+
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+np = pytest.importorskip('numpy')
+bulk = pytest.importorskip('pysds011.bulk')
+
+
+class TestBulkDecoder(unittest.TestCase):
+    """ Tests bulk decoder against SDS011.read_and_decode_data """
+
+    def setUp(self):
+        self.sensor_simulation = SimulationSDS011()
+        self.sensor_simulation.read_sample_data_sds011()
+        self.sample = bytes(self.sensor_simulation.data)
+
+    def test_decode_file_matches_sds011(self):
+        """ Bulk decode gives the same values as frame by frame decode """
+        result = bulk.decode_file(self.sensor_simulation.path_to_sample_binary)
+        self.assertEqual(len(result.pm25), len(self.sample) // 10)
+        sensor = SDS011(self.sensor_simulation)
+        self.sensor_simulation.data = self.sample
+        self.sensor_simulation.offset = 0
+        for pm25, pm10 in zip(result.pm25[:10], result.pm10[:10]):
+            sensor.read_and_decode_data()
+            self.assertEqual(sensor.data['PM2.5'], pm25)
+            self.assertEqual(sensor.data['PM10'], pm10)
+        self.assertTrue(np.all(result.device_id == 0x7050))
+        self.assertTrue(np.all(np.diff(result.offset) == 10))
+
+    def test_skip_invalid_frames(self):
+        """ Garbage and broken checksums are skipped """
+        frame = b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab'
+        broken = b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0b\xab'
+        result = bulk.decode_buffer(b'\xaa\x01' + broken + frame + frame[:5])
+        self.assertEqual(result.offset.tolist(), [12])
+        self.assertEqual(result.pm25.tolist(), [3.4])
+        self.assertEqual(result.pm10.tolist(), [4.0])
+        self.assertEqual(len(bulk.decode_buffer(b'').pm25), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+""" Test polling of several sensors on one serial line """
+
+import unittest
+
+from pysds011.bus import SDS011Bus
+from pysds011.simulation.sim_bus import SimulationBus
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestSDS011Bus(unittest.TestCase):
+    """ Tests SDS011Bus class with SimulationBus """
+
+    def setUp(self):
+        self.simulations = []
+        for i in range(4):
+            simulation = SimulationSDS011()
+            simulation.device_id = [1, i]
+            simulation.measurement_data = [10 + i, 0, 20 + i, 1]
+            self.simulations.append(simulation)
+        self.sensor_bus = SimulationBus(self.simulations)
+        self.device_ids = [simulation.device_id for simulation in self.simulations]
+
+    def test_poll(self):
+        """ Replies are routed to their sensors """
+        for window in (1, 3):
+            bus = SDS011Bus(self.sensor_bus, self.device_ids, window=window)
+            data = bus.poll()
+            self.assertEqual(list(data), ['0100', '0101', '0102', '0103'])
+            self.assertEqual(data['0102'], {'PM2.5': 1.2, 'PM10': 27.8})
+            self.assertEqual(bus.device([1, 3]).received, 1)
+            self.assertEqual(bus.device([1, 3]).last_reply[6:8], bytes([1, 3]))
+
+    def test_poll_order_and_missing_device(self):
+        """ Planned order is kept and missing sensors are counted """
+        bus = SDS011Bus(self.sensor_bus, [[1, 2], [9, 9], [1, 0]], timeout=0.05)
+        data = bus.poll()
+        self.assertEqual(list(data), ['0102', '0909', '0100'])
+        self.assertEqual(bus.device([9, 9]).missed, 1)
+        self.assertEqual(bus.device([1, 0]).received, 1)
+        data = bus.poll(order=[[1, 0]])
+        self.assertEqual(list(data), ['0100'])
+        self.assertEqual(bus.device([1, 0]).received, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+""" Test frame offset index for capture files """
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from pysds011.capture_index import CaptureIndex, fixed_interval
+from pysds011.reader import FrameReader
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestCaptureIndex(unittest.TestCase):
+    """ Tests CaptureIndex class with a capture built from sample data """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        simulation = SimulationSDS011()
+        sample = simulation.path_to_sample_binary.read_bytes()
+        # some garbage between repetitions of the sample data
+        self.capture = Path(self.directory.name) / 'capture.hex'
+        self.capture.write_bytes((sample + b'\xaa\x00\x01') * 50)
+        simulation.data = self.capture.read_bytes()
+        reader = FrameReader(simulation)
+        self.frames = [reader.read_frame() for _ in range(54 * 50)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_seek_by_frame(self):
+        """ Frames read from an index position match a full parse """
+        index = CaptureIndex.build(self.capture, every=100)
+        self.assertEqual(index.frames, len(self.frames))
+        self.assertEqual(len(index.offsets), 27)
+        index.save()
+        index = CaptureIndex.load(self.capture)
+        for frame_number in (0, 99, 100, 1234, len(self.frames) - 1):
+            frames = list(index.frames_from(frame_number, 3))
+            self.assertEqual(frames, self.frames[frame_number:frame_number + 3])
+        with self.assertRaises(IndexError):
+            index.locate(len(self.frames))
+
+    def test_seek_by_time(self):
+        """ Frames are found by capture time """
+        index = CaptureIndex.build(self.capture, every=64,
+                                   timestamp=fixed_interval(1000.0, 1.0))
+        index.save()
+        index = CaptureIndex.load(self.capture)
+        self.assertTrue(index.has_timestamps)
+        self.assertEqual(index.frame_number_at(1500.0), 500)
+        self.assertEqual(index.frame_number_at(1500.5), 501)
+        self.assertEqual(index.frame_number_at(999.0), 0)
+        self.assertEqual(index.frame_number_at(1000.0 + len(self.frames) - 1), len(self.frames) - 1)
+        self.assertEqual(list(index.frames_between(1500.0, 1510.0)), self.frames[500:510])
+        self.assertEqual(list(index.frames_between(9000.0, 9010.0)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
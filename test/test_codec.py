@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+""" Test frame codec """
+
+import unittest
+
+from pysds011 import codec
+from pysds011.definitions import Command, Frame, MessageType
+
+
+class TestCodec(unittest.TestCase):
+    """ Tests codec functions """
+
+    def test_constants(self):
+        """ Integer constants match the Enum definitions """
+        self.assertEqual(codec.HEADER, Frame.HEADER.value)
+        self.assertEqual(codec.TAIL, Frame.TAIL.value)
+        self.assertEqual(codec.COMMAND, MessageType.COMMAND.value)
+        self.assertEqual(codec.COMMAND_REPLY, MessageType.COMMAND_REPLY.value)
+        self.assertEqual(codec.DATA, MessageType.DATA.value)
+
+    def test_command(self):
+        """ Command frames are packed, validated and unpacked """
+        frame = codec.pack_command(Command.QUERY_DATA.value, [0])
+        self.assertEqual(frame, bytes([0xaa, 0xb4, 0x04] + [0]*12 + [0xff, 0xff, 0x02, 0xab]))
+        self.assertTrue(codec.command_valid(frame))
+        self.assertEqual(codec.unpack_command(frame), (4, bytes(12), b'\xff\xff'))
+
+        frame = codec.pack_command(Command.SET_DEVICE_ID.value, [0]*10 + [1, 2], [10, 11])
+        self.assertTrue(codec.command_valid(frame))
+        self.assertEqual(codec.unpack_command(frame)[2], bytes([10, 11]))
+        self.assertFalse(codec.command_valid(frame[:-2] + b'\x00\xab'))
+        self.assertFalse(codec.command_valid(frame[:-1]))
+        with self.assertRaises(AssertionError):
+            codec.pack_command(Command.QUERY_DATA.value, [0]*13)
+
+    def test_reply(self):
+        """ Reply and data frames are packed, validated and unpacked """
+        frame = bytes.fromhex('aac02200280070500aab')
+        self.assertTrue(codec.reply_valid(frame))
+        self.assertEqual(codec.unpack_pm(frame), (34, 40))
+        self.assertEqual(codec.pack_data(34, 40, [0x70, 0x50]), frame)
+        self.assertEqual(codec.pack_reply(codec.DATA, frame[2:8]), frame)
+        self.assertEqual(codec.pack_data(1000, 300, [1, 2]),
+                         codec.pack_reply(codec.DATA, [0xe8, 0x03, 0x2c, 0x01, 1, 2]))
+
+        self.assertFalse(codec.reply_valid(frame[:-1]))
+        self.assertFalse(codec.reply_valid(frame[:8] + b'\x00\xab'))
+        self.assertFalse(codec.reply_valid(b'\xaa\xb4' + frame[2:]))
+        self.assertTrue(codec.reply_valid(memoryview(bytearray(frame))))
+
+
+if __name__ == '__main__':
+    unittest.main()
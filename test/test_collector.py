@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+""" Test process pool collector """
+
+import time
+import unittest
+
+from pysds011 import codec
+from pysds011.collector import ProcessPoolCollector, SharedReadings
+from pysds011.metrics import Metrics
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+def open_simulated_port(port: str) -> SimulationSDS011:
+    """ Simulation sending data frames with the port number as PM2.5 and device id """
+    simulation = SimulationSDS011()
+    if port != 'silent':
+        number = int(port[3:])
+        simulation.data = codec.pack_data(number * 10, 42, [0, number]) * 10
+    return simulation
+
+
+class TestCollector(unittest.TestCase):
+    """ Tests ProcessPoolCollector with SimulationSDS011 ports """
+
+    def test_shared_readings(self):
+        """ Counters can be published without a frame """
+        readings = SharedReadings(2)
+        metrics = Metrics()
+        metrics.frames_read = 5
+        readings.write(1, metrics, 12.5, codec.pack_data(123, 456, [1, 2]))
+        metrics.timeouts = 1
+        readings.write(1, metrics)
+        reading = readings.read(1, 'COM1')
+        self.assertEqual(reading.timestamp, 12.5)
+        self.assertEqual((reading.pm25, reading.pm10, reading.device_id), (12.3, 45.6, '0102'))
+        self.assertEqual((reading.frames_read, reading.timeouts), (5, 1))
+        self.assertEqual(readings.read(0).timestamp, 0.0)
+
+    def test_collect(self):
+        """ Workers publish readings of all ports """
+        ports = ['sim1', 'sim2', 'sim3', 'silent']
+        collector = ProcessPoolCollector(ports, workers=2, open_port=open_simulated_port,
+                                         poll_timeout=0.01)
+        self.assertEqual(collector.assignments(),
+                         [[(0, 'sim1'), (2, 'sim3')], [(1, 'sim2'), (3, 'silent')]])
+        with collector:
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                readings = collector.readings()
+                if (all(readings[port].frames_read for port in ports[:3]) and
+                        readings['silent'].timeouts):
+                    break
+                time.sleep(0.01)
+            self.assertEqual(collector.alive(), 2)
+        self.assertEqual(collector.alive(), 0)
+
+        readings = collector.readings()
+        for number in (1, 2, 3):
+            reading = readings['sim%d' % number]
+            self.assertEqual((reading.pm25, reading.pm10), (number, 4.2))
+            self.assertEqual(reading.device_id, '000%d' % number)
+            self.assertGreater(reading.timestamp, 0)
+        self.assertEqual(readings['silent'].frames_read, 0)
+        self.assertEqual(readings['silent'].timestamp, 0.0)
+        self.assertGreater(readings['silent'].timeouts, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
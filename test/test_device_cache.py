@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+""" Test lazy handshake and persisted device metadata """
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from pysds011.device_cache import DeviceCache
+from pysds011.pipeline import CommandPipeline
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestDeviceCache(unittest.TestCase):
+    """ Tests DeviceCache class and lazy SDS011 with SimulationSDS011 """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'devices.json'
+        self.sensor_simulation = SimulationSDS011()
+        self.sensor_simulation.port = '/dev/ttyUSB0'
+
+    def tearDown(self):
+        self.sensor_simulation.close()
+        self.directory.cleanup()
+
+    def test_cache_roundtrip(self):
+        """ Entries survive a reload, unchanged entries are not rewritten """
+        cache = DeviceCache(self.path)
+        self.assertIsNone(cache.get('COM4'))
+        self.assertTrue(cache.update('COM4', [1, 2], {'year': 15, 'month': 7, 'day': 10}))
+        self.assertFalse(cache.update('COM4', [1, 2], {'year': 15, 'month': 7, 'day': 10}))
+        reloaded = DeviceCache(self.path)
+        self.assertEqual(reloaded.get('COM4')['device_id'], [1, 2])
+        reloaded.remove('COM4')
+        self.assertIsNone(DeviceCache(self.path).get('COM4'))
+
+    def test_corrupt_cache(self):
+        """ Unreadable file is an empty cache """
+        self.path.write_text('{not json')
+        self.assertEqual(DeviceCache(self.path).entries, {})
+
+    def test_handshake_fills_cache(self):
+        """ Eager construction stores metadata of the port """
+        cache = DeviceCache(self.path)
+        SDS011(self.sensor_simulation, device_cache=cache)
+        entry = DeviceCache(self.path).get('/dev/ttyUSB0')
+        self.assertEqual(entry['device_id'], [10, 11])
+        self.assertEqual(entry['firmware'], {'year': 15, 'month': 7, 'day': 10})
+
+    def test_lazy_construction(self):
+        """ Lazy sensor sends nothing until the first command """
+        self.sensor_simulation.read_sample_data_sds011()
+        sensor = SDS011(self.sensor_simulation, lazy=True)
+        self.assertTrue(sensor.handshake_pending)
+        self.assertIsNone(sensor.device_id)
+        self.assertIsNone(self.sensor_simulation.command)
+        sensor.read_and_decode_data()
+        self.assertIsNone(self.sensor_simulation.command)
+
+        sensor.query_data()
+        self.assertFalse(sensor.handshake_pending)
+        self.assertEqual(sensor.device_id, [10, 11])
+        self.assertEqual(sensor.data, {'PM2.5': 3.4, 'PM10': 4.0})
+
+    def test_lazy_with_cache(self):
+        """ Cached metadata is available at once and checked by the handshake """
+        cache = DeviceCache(self.path)
+        cache.update('/dev/ttyUSB0', [10, 11], {'year': 15, 'month': 7, 'day': 10})
+        sensor = SDS011(self.sensor_simulation, lazy=True, device_cache=cache)
+        self.assertEqual(sensor.get_device_id(), '0A0B')
+        self.assertTrue(sensor.handshake())
+
+        self.sensor_simulation.device_id = [1, 2]
+        sensor = SDS011(self.sensor_simulation, lazy=True, device_cache=cache)
+        self.assertEqual(sensor.device_id, [10, 11])
+        self.assertFalse(sensor.handshake())
+        self.assertEqual(sensor.device_id, [1, 2])
+        self.assertEqual(DeviceCache(self.path).get('/dev/ttyUSB0')['device_id'], [1, 2])
+
+    def test_lazy_pipeline(self):
+        """ Pipeline runs the pending handshake first """
+        sensor = SDS011(self.sensor_simulation, lazy=True)
+        replies = CommandPipeline(sensor).query_data().execute()
+        self.assertEqual(len(replies), 1)
+        self.assertFalse(sensor.handshake_pending)
+        self.assertEqual(sensor.device_id, [10, 11])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+""" Test measurement history and rolling aggregates """
+
+import random
+import unittest
+
+from pysds011.history import MeasurementHistory
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestMeasurementHistory(unittest.TestCase):
+    """ Tests MeasurementHistory class """
+
+    def test_rolling_aggregates(self):
+        """ Rolling aggregates match aggregates computed from scratch """
+        history = MeasurementHistory(capacity=50, windows=(10.0, 100.0))
+        entries = []
+        generator = random.Random(1)
+        for second in range(200):
+            pm25, pm10 = generator.randrange(1000), generator.randrange(1000)
+            history.append(pm25, pm10, timestamp=float(second))
+            entries.append((second, pm25, pm10))
+            for duration, stored in ((10.0, 10), (100.0, 50)):
+                window = entries[-min(stored, len(entries)):]
+                result = history.aggregate(duration)
+                self.assertEqual(result['count'], len(window))
+                self.assertAlmostEqual(result['PM2.5']['mean'],
+                                       sum(entry[1] for entry in window) / len(window) / 10)
+                self.assertEqual(result['PM2.5']['min'], min(entry[1] for entry in window) / 10)
+                self.assertEqual(result['PM10']['max'], max(entry[2] for entry in window) / 10)
+        self.assertEqual(len(history), 50)
+        self.assertEqual(list(history)[0], (150.0, entries[150][1], entries[150][2]))
+        self.assertEqual(history.latest(1), [(199.0, entries[-1][1], entries[-1][2])])
+
+    def test_expire_on_query(self):
+        """ Old values expire when queried with a later time """
+        history = MeasurementHistory(capacity=10, windows=(60.0,))
+        history.append(100, 200, timestamp=0.0)
+        self.assertEqual(history.aggregate(60.0, now=30.0)['count'], 1)
+        result = history.aggregate(60.0, now=61.0)
+        self.assertEqual(result['count'], 0)
+        self.assertIsNone(result['PM10']['mean'])
+
+    def test_sds011_history(self):
+        """ SDS011 stores decoded measurements in history """
+        simulation = SimulationSDS011()
+        history = MeasurementHistory(capacity=10, windows=(60.0,))
+        sensor = SDS011(simulation, history=history)
+        simulation.read_sample_data_sds011()
+        for _ in range(3):
+            sensor.read_and_decode_data()
+        self.assertEqual([entry[1:] for entry in history], [(34, 40), (34, 40), (33, 40)])
+        self.assertAlmostEqual(history.aggregate(60.0)['PM2.5']['mean'], 3.3666666666)
+        simulation.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
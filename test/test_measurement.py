@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+""" Test Measurement records of the decode paths """
+
+import asyncio
+import time
+import unittest
+
+from pysds011 import codec
+from pysds011.async_sds011 import AsyncSDS011
+from pysds011.measurement import Measurement
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+from pysds011.simulation.sim_stream import open_simulation
+from pysds011.stream_stats import StreamStatistics
+
+
+class TestMeasurement(unittest.TestCase):
+    """ Tests Measurement with SDS011, AsyncSDS011 and SimulationSDS011 """
+
+    def setUp(self):
+        self.sensor_simulation = SimulationSDS011()
+        self.sensor = SDS011(self.sensor_simulation)
+
+    def tearDown(self):
+        self.sensor_simulation.close()
+
+    def test_from_frame(self):
+        """ Raw values, device id and float properties of a data frame """
+        measurement = Measurement.from_frame(codec.pack_data(123, 4567, b'\x12\xab'), 5.0)
+        self.assertEqual(measurement, (5.0, 0x12AB, 123, 4567))
+        self.assertEqual(measurement.pm25, 12.3)
+        self.assertEqual(measurement.pm10, 456.7)
+        self.assertEqual(measurement.get_device_id(), '12AB')
+        self.assertEqual(measurement.as_dict(), {'PM2.5': 12.3, 'PM10': 456.7})
+        with self.assertRaises(AttributeError):
+            measurement.pm25_raw = 1
+        self.assertFalse(hasattr(measurement, '__dict__'))
+
+    def test_decode_data(self):
+        """ Decoding returns a Measurement and keeps data compatible """
+        self.sensor_simulation.read_sample_data_sds011()
+        start = time.monotonic()
+        measurement = self.sensor.read_and_decode_data()
+        self.assertIs(measurement, self.sensor.measurement)
+        self.assertTrue(start <= measurement.timestamp <= time.monotonic())
+        self.assertEqual(measurement.timestamp, self.sensor.last_reply_time)
+        self.assertEqual(measurement.get_device_id(), self.sensor.last_reply[6:8].hex().upper())
+        self.assertEqual(measurement.as_dict(), self.sensor.data)
+        self.sensor.last_reply = b'\xaa\xc0'
+        self.assertIsNone(self.sensor.decode_data())
+        self.assertIs(self.sensor.measurement, measurement)
+
+    def test_read_measurements(self):
+        """ Batch read returns data frames in order, fewer on timeout """
+        self.sensor_simulation.read_sample_data_sds011()
+        measurements = self.sensor.read_measurements(50)
+        self.assertEqual(len(measurements), 50)
+        self.assertEqual(measurements[-1], self.sensor.measurement)
+        timestamps = [measurement.timestamp for measurement in measurements]
+        self.assertEqual(timestamps, sorted(timestamps))
+        statistics = StreamStatistics()
+        for measurement in measurements:
+            statistics.add_measurement(measurement)
+        self.assertEqual(statistics.devices[measurements[0].get_device_id()][0].stats.count, 50)
+
+        idle = SDS011(SimulationSDS011())
+        self.assertEqual(idle.read_measurements(5, timeout=0.05), [])
+
+    def test_async_records(self):
+        """ AsyncSDS011 yields Measurement records """
+        async def run():
+            sensor = await AsyncSDS011.create(*open_simulation(self.sensor_simulation))
+            self.sensor_simulation.read_sample_data_sds011()
+            records = []
+            async for record in sensor.records():
+                records.append(record)
+                if len(records) == 10:
+                    break
+            self.assertEqual(records[-1], sensor.measurement)
+            self.assertEqual(records[-1].as_dict(), sensor.data)
+            self.assertEqual(records[-1].get_device_id(), sensor.last_reply[6:8].hex().upper())
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+""" Test sliding median filter """
+
+import random
+import statistics
+import unittest
+
+from pysds011 import codec
+from pysds011.median_filter import IndexableSkiplist, SlidingMedianFilter, SlidingWindow
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestMedianFilter(unittest.TestCase):
+    """ Tests IndexableSkiplist, SlidingWindow and SlidingMedianFilter """
+
+    def setUp(self):
+        self.random = random.Random(3)
+
+    def test_skiplist(self):
+        """ Skiplist stays sorted under random inserts and removes """
+        skiplist = IndexableSkiplist(64, seed=1)
+        reference = []
+        for _ in range(2000):
+            if reference and self.random.random() < 0.45:
+                value = self.random.choice(reference)
+                reference.remove(value)
+                skiplist.remove(value)
+            else:
+                value = self.random.randint(0, 50)
+                reference.append(value)
+                skiplist.insert(value)
+            reference.sort()
+            self.assertEqual(len(skiplist), len(reference))
+        self.assertEqual([skiplist[rank] for rank in range(len(skiplist))], reference)
+        with self.assertRaises(KeyError):
+            skiplist.remove(1000)
+        with self.assertRaises(IndexError):
+            skiplist[len(skiplist)]
+
+    def test_window_median_mad(self):
+        """ Median and MAD equal the results of sorting the window """
+        for size in (1, 2, 5, 8, 31):
+            window = SlidingWindow(size, seed=2)
+            values = []
+            for _ in range(200):
+                value = self.random.randint(0, 1000)
+                window.push(value)
+                values = (values + [value])[-size:]
+                median = statistics.median(values)
+                self.assertEqual(window.median(), median)
+                self.assertEqual(window.mad(), statistics.median(abs(v - median) for v in values))
+
+    def test_spikes_are_rejected(self):
+        """ Single frame spikes are replaced by the median and counted """
+        median_filter = SlidingMedianFilter(window=5, seed=4)
+        output = [median_filter.update(pm25, 40) for pm25 in
+                  (100, 102, 101, 103, 900, 102, 101, 5, 104)]
+        self.assertEqual([pm25 for pm25, _, _ in output],
+                         [100, 102, 101, 103, 102, 102, 101, 102, 104])
+        self.assertEqual([rejected for _, _, rejected in output],
+                         [False] * 4 + [True, False, False, True, False])
+        self.assertEqual((median_filter.frames, median_filter.rejected), (9, 2))
+
+    def test_small_changes_pass(self):
+        """ Deviations below min_deviation are kept even with zero MAD """
+        median_filter = SlidingMedianFilter(window=5, min_deviation=10)
+        for _ in range(5):
+            median_filter.update(100, 100)
+        self.assertEqual(median_filter.update(110, 90), (110, 90, False))
+        self.assertEqual(median_filter.update(100, 111), (100, 100, True))
+
+    def test_sds011_filter(self):
+        """ SDS011 decodes filtered data and flags rejected frames """
+        simulation = SimulationSDS011()
+        sensor = SDS011(simulation, median_filter=SlidingMedianFilter(window=3))
+        frames = [codec.pack_data(pm25, 50, [10, 11]) for pm25 in (100, 100, 100, 2000, 100)]
+        simulation.data = b''.join(frames)
+        simulation.offset = 0
+        flags = []
+        for _ in frames:
+            sensor.read_and_decode_data()
+            flags.append(sensor.rejected)
+        self.assertEqual(flags, [False, False, False, True, False])
+        self.assertEqual(sensor.data, {'PM2.5': 10.0, 'PM10': 5.0})
+        simulation.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
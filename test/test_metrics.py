@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+""" Test counters and latency histograms """
+
+import unittest
+
+from pysds011.definitions import Command
+from pysds011.metrics import Metrics, LatencyHistogram
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestMetrics(unittest.TestCase):
+    """ Tests Metrics class with SDS011 and SimulationSDS011 """
+
+    def setUp(self):
+        self.sensor_simulation = SimulationSDS011()
+        self.metrics = Metrics()
+        self.sensor = SDS011(self.sensor_simulation, metrics=self.metrics)
+
+    def test_histogram(self):
+        """ Values are counted in the first bucket with bound >= value """
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(list(snapshot['buckets'].values()), [2, 3, 4])
+        self.assertEqual(snapshot['count'], 4)
+        self.assertAlmostEqual(snapshot['sum'], 3.65)
+
+    def test_sds011_counters(self):
+        """ Frames, skipped bytes and command latencies are recorded """
+        self.sensor.query_data()
+        self.sensor_simulation.data = b'\x00\xaa' + b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab'
+        self.sensor_simulation.offset = 0
+        self.sensor.read_message()
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['frames_read'], 3)
+        self.assertEqual(snapshot['bytes_skipped'], 2)
+        self.assertEqual(snapshot['commands'], 2)
+        self.assertEqual(snapshot['latency'][Command.QUERY_DATA.name]['count'], 1)
+        self.assertEqual(snapshot['latency'][Command.GET_FIRMWARE.name]['count'], 1)
+
+    def test_timeout(self):
+        """ Timeouts are counted """
+        self.sensor_simulation.read_sample_data_sds011()
+        self.sensor_simulation.write = len
+        with self.assertRaises(TimeoutError):
+            self.sensor.get_working_mode(timeout=0.01)
+        self.assertEqual(self.metrics.timeouts, 1)
+        self.assertGreater(self.metrics.unmatched_frames, 0)
+
+    def test_prometheus(self):
+        """ Export in Prometheus text format """
+        text = self.metrics.to_prometheus(labels={'port': 'sim'})
+        self.assertIn('# TYPE sds011_frames_read_total counter\n', text)
+        self.assertIn('sds011_frames_read_total{port="sim"} 1\n', text)
+        self.assertIn('sds011_command_latency_seconds_bucket{port="sim",command="GET_FIRMWARE",'
+                      'le="+Inf"} 1\n', text)
+        self.assertIn('sds011_command_latency_seconds_count{port="sim",command="GET_FIRMWARE"} 1\n',
+                      text)
+
+
+if __name__ == '__main__':
+    unittest.main()
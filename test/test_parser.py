@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+""" Test incremental frame parser """
+
+import unittest
+
+from pysds011.parser import FrameParser
+
+FRAME = b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab'
+
+
+class TestFrameParser(unittest.TestCase):
+    """ Tests FrameParser class """
+
+    def setUp(self):
+        self.parser = FrameParser(capacity=32)
+
+    def test_arbitrary_chunks(self):
+        """ Frames split over chunks are reassembled """
+        stream = FRAME * 7
+        frames = []
+        for i in range(0, len(stream), 3):
+            frames.extend(bytes(frame) for frame in self.parser.parse(stream[i:i + 3]))
+        self.assertEqual(frames, [FRAME] * 7)
+        self.assertEqual(self.parser.pending, 0)
+
+    def test_large_chunk(self):
+        """ Chunks larger than the buffer are parsed in pieces """
+        frames = [bytes(frame) for frame in self.parser.parse(FRAME * 20)]
+        self.assertEqual(frames, [FRAME] * 20)
+
+    def test_resync_after_checksum_error(self):
+        """ Parser resyncs at the next header after a checksum error """
+        broken = b'\xaa\xc0\x22\x00\xaa\xc0\x22\x00\x28\x00'
+        frames = [bytes(frame) for frame in self.parser.parse(b'\x00' + broken + FRAME)]
+        self.assertEqual(frames, [FRAME])
+        self.assertEqual(self.parser.invalid_frames, 2)
+        self.assertEqual(self.parser.skipped_bytes, 11)
+
+    def test_frame_is_view(self):
+        """ Frames are memoryviews into the preallocated buffer """
+        self.parser.feed(FRAME)
+        frame = self.parser.next_frame()
+        self.assertIsInstance(frame, memoryview)
+        self.assertIs(frame.obj, self.parser.buffer)
+        self.assertIsNone(self.parser.next_frame())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+""" Test pipelined commands """
+
+import unittest
+
+from pysds011.definitions import WorkingMode, ReportMode, Modifier, Command, MessageType
+from pysds011.pipeline import CommandPipeline
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+DATA_FRAME = b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab'
+
+
+class TestCommandPipeline(unittest.TestCase):
+    """ Tests CommandPipeline class with SimulationSDS011 """
+
+    def setUp(self):
+        self.sensor_simulation = SimulationSDS011()
+        self.sensor = SDS011(self.sensor_simulation)
+        self.pipeline = CommandPipeline(self.sensor)
+
+    def test_execute(self):
+        """ Commands are written at once and replies matched in queue order """
+        self.pipeline.set_report_mode(ReportMode.REPORT_QUERY_MODE)
+        self.pipeline.get_report_mode().set_working_mode(WorkingMode.SLEEP_MODE)
+        self.pipeline.set_working_period(5).query_data()
+        self.pipeline.set_device_id([20, 21], device_id=[10, 11]).get_firmware_version()
+        replies = self.pipeline.execute()
+        self.assertEqual(len(replies), 7)
+        self.assertEqual([reply[2] for reply in replies[:4]],
+                         [Command.REPORT_MODE.value, Command.REPORT_MODE.value,
+                          Command.WORKING_MODE.value, Command.WORKING_PERIOD.value])
+        self.assertEqual(replies[0][3], Modifier.SET.value)
+        self.assertEqual(replies[1][3], Modifier.GET.value)
+        self.assertEqual(replies[4][1], MessageType.DATA.value)
+        self.assertEqual(self.sensor_simulation.report_mode, ReportMode.REPORT_QUERY_MODE)
+        self.assertEqual(self.sensor_simulation.working_period, 5)
+        self.assertEqual(self.sensor.device_id, [20, 21])
+        self.assertEqual(self.sensor.data, {'PM2.5': 3.4, 'PM10': 4.0})
+        self.assertEqual(len(self.pipeline), 0)
+
+    def test_data_frames_mixed_in(self):
+        """ DATA frames between replies are decoded and skipped """
+        reply = SDS011.command_frame(Command.WORKING_PERIOD, [Modifier.GET.value])
+        self.sensor_simulation.write(reply)
+        period_reply = bytes(self.sensor_simulation.data)
+        self.sensor_simulation.write = len
+        self.sensor_simulation.data = DATA_FRAME + DATA_FRAME + period_reply
+        self.sensor_simulation.offset = 0
+        replies = self.pipeline.get_working_period().execute()
+        self.assertEqual(replies, [period_reply])
+        self.assertEqual(self.sensor.data, {'PM2.5': 3.4, 'PM10': 4.0})
+
+    def test_wrong_device_id(self):
+        """ Replies from other devices do not match """
+        self.sensor_simulation.write = len
+        self.sensor_simulation.read_sample_data_sds011()
+        with self.assertRaises(TimeoutError):
+            self.pipeline.query_data(device_id=[1, 2]).execute(timeout=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+""" Test simulated sensors behind pseudo-terminals """
+
+import time
+import unittest
+
+import pytest
+
+pytest.importorskip('termios')
+serial = pytest.importorskip('serial')
+
+from pysds011.definitions import ReportMode  # noqa: E402
+from pysds011.sds011 import SDS011  # noqa: E402
+from pysds011.simulation.pty_farm import PTYFarm  # noqa: E402
+
+
+class TestPTYFarm(unittest.TestCase):
+    """ Tests PTYFarm with SDS011 on pyserial ports """
+
+    def setUp(self):
+        self.farm = PTYFarm(3, interval=0.02, device_ids=[[1, 1], [1, 2], [1, 3]]).start()
+        self.ports = []
+
+    def tearDown(self):
+        for port in self.ports:
+            port.close()
+        self.farm.stop()
+
+    def open(self, index: int) -> SDS011:
+        """ Open sensor of the farm with pyserial """
+        port = serial.Serial(self.farm.ports[index], 9600, timeout=0.1)
+        self.ports.append(port)
+        return SDS011(port, timeout=1.0)
+
+    def test_active_mode(self):
+        """ Handshake works and data frames arrive at the configured rate """
+        sensor = self.open(1)
+        self.assertEqual(sensor.get_device_id(), '0102')
+        self.assertEqual(sensor.firmware, {'year': 15, 'month': 7, 'day': 10})
+        start = time.monotonic()
+        for _ in range(10):
+            sensor.read_and_decode_data(timeout=1.0)
+        self.assertGreater(time.monotonic() - start, 0.1)
+        self.assertEqual(sensor.data, {'PM2.5': 3.4, 'PM10': 4.0})
+        self.assertEqual(sensor.last_reply[6:8], b'\x01\x02')
+
+    def test_query_mode(self):
+        """ Commands are answered, no data frames are sent in query mode """
+        sensor = self.open(0)
+        sensor.set_report_mode(ReportMode.REPORT_QUERY_MODE)
+        time.sleep(0.1)
+        sent = self.farm.stats()[self.farm.ports[0]]['frames_sent']
+        sensor.query_data()
+        sensor.decode_data()
+        self.assertEqual(sensor.data, {'PM2.5': 3.4, 'PM10': 4.0})
+        time.sleep(0.1)
+        stats = self.farm.stats()[self.farm.ports[0]]
+        self.assertEqual(stats['frames_sent'], sent)
+        self.assertEqual(stats['commands'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+""" Test buffered frame reader """
+
+import time
+import unittest
+
+from pysds011.reader import FrameReader
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestFrameReader(unittest.TestCase):
+    """ Tests FrameReader class """
+
+    def setUp(self):
+        self.sensor_simulation = SimulationSDS011()
+        self.reader = FrameReader(self.sensor_simulation)
+
+    def test_read_sample_data(self):
+        """ Read consecutive frames from sample data """
+        self.sensor_simulation.read_sample_data_sds011()
+        self.assertEqual(self.reader.read_frame().hex(), 'aac02200280070500aab')
+        self.assertEqual(self.reader.read_frame().hex(), 'aac02200280070500aab')
+        self.assertEqual(self.reader.read_frame().hex(), 'aac021002800705009ab')
+
+    def test_resync_on_header_in_payload(self):
+        """ Broken frame with 0xAA in payload does not swallow the next frame """
+        frame = b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab'
+        broken = b'\xaa\xc0\xaa\x00\x28'
+        self.sensor_simulation.data = b'\x01' + broken + frame
+        self.assertEqual(self.reader.read_frame(), frame)
+        self.assertEqual(self.sensor_simulation.offset, 16)
+
+    def test_leftovers_kept(self):
+        """ Bytes of a following frame are kept across calls """
+        frame = b'\xaa\xc0\x22\x00\x28\x00\x70\x50\x0a\xab'
+        self.reader.parser.feed(frame + frame[:4])
+        self.sensor_simulation.data = frame[4:]
+        self.assertEqual(self.reader.read_frame(), frame)
+        self.assertEqual(self.reader.read_frame(), frame)
+        self.assertEqual(self.reader.parser.pending, 0)
+
+    def test_deadline(self):
+        """ Reading stops at the deadline without spinning on empty reads """
+        reads = []
+        self.sensor_simulation.data = b''
+        self.sensor_simulation.read = lambda size: reads.append(size) or b''
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            self.reader.read_frame(deadline=start + 0.05)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertLess(len(reads), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+""" Test compact binary recording """
+
+import io
+import random
+import unittest
+
+from pysds011.recording import RecordWriter, RecordReader
+
+
+class TestRecording(unittest.TestCase):
+    """ Tests RecordWriter and RecordReader classes """
+
+    def setUp(self):
+        generator = random.Random(2)
+        self.records = []
+        pm25, pm10 = 100, 200
+        for second in range(1000):
+            for device_id in ([1, 2], [3, 4]):
+                pm25 = max(0, pm25 + generator.randint(-20, 20))
+                pm10 = max(0, pm10 + generator.randint(-20, 20))
+                self.records.append((1600000000.0 + second + device_id[0] / 10, device_id,
+                                     pm25, pm10))
+        self.file = io.BytesIO()
+        with RecordWriter(self.file, block_size=100) as writer:
+            for timestamp, device_id, pm25, pm10 in self.records:
+                writer.write(device_id, pm25, pm10, timestamp=timestamp)
+        self.file.seek(0)
+
+    def test_round_trip(self):
+        """ Records are read back unchanged """
+        reader = RecordReader(self.file)
+        records = sorted(reader, key=lambda record: (record[1], record[0]))
+        self.assertEqual(records, sorted(self.records, key=lambda record: (record[1], record[0])))
+        self.assertLess(len(self.file.getvalue()), len(self.records) * 5)
+
+    def test_filter(self):
+        """ Blocks are skipped by device id and time range """
+        reader = RecordReader(self.file)
+        headers = [header for header, _ in reader.blocks()]
+        self.assertEqual(len(headers), 20)
+        self.assertEqual(headers[0].count, 100)
+        start, end = 1600000500.0, 1600000510.0
+        records = list(reader.records(device_id=[3, 4], start=start, end=end))
+        expected = [record for record in self.records
+                    if record[1] == [3, 4] and start <= record[0] <= end]
+        self.assertEqual(records, expected)
+
+    def test_decreasing_timestamp(self):
+        """ Timestamps of a device must not decrease """
+        writer = RecordWriter(io.BytesIO())
+        writer.write([1, 2], 1, 1, timestamp=10.0)
+        writer.write([3, 4], 1, 1, timestamp=5.0)
+        with self.assertRaises(ValueError):
+            writer.write([1, 2], 1, 1, timestamp=9.0)
+
+    def test_invalid_file(self):
+        """ Files without header are rejected """
+        with self.assertRaises(ValueError):
+            RecordReader(io.BytesIO(b'abcdef'))
+
+
+if __name__ == '__main__':
+    unittest.main()
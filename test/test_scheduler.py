@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+""" Test duty cycle scheduler """
+
+import unittest
+
+from pysds011.definitions import WorkingMode, ReportMode
+from pysds011.scheduler import DutyCycleScheduler, SensorPlan
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class FakeClock:
+    """ Manually advanced clock """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestDutyCycleScheduler(unittest.TestCase):
+    """ Tests DutyCycleScheduler with SimulationSDS011 sensors """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.simulations = []
+
+    def tearDown(self):
+        for simulation in self.simulations:
+            simulation.close()
+
+    def sensor(self, number: int) -> SDS011:
+        """ Simulated sensor with device id [1, number] """
+        simulation = SimulationSDS011()
+        simulation.device_id = [1, number]
+        self.simulations.append(simulation)
+        return SDS011(simulation)
+
+    def test_phases_are_staggered(self):
+        """ Sensors with equal intervals on one port are spread evenly """
+        plans = [SensorPlan(self.sensor(number), interval=10, warmup=0, port='COM1')
+                 for number in range(4)]
+        DutyCycleScheduler(plans, slot=0.5, candidates=20).plan()
+        self.assertEqual(sorted(plan.phase for plan in plans), [0.0, 2.5, 5.0, 7.5])
+
+    def test_ports_and_host_are_levelled(self):
+        """ No slot is shared and sensors of one port stay far apart """
+        plans = [SensorPlan(self.sensor(number), interval=10, warmup=0,
+                            port='COM%d' % (number % 2)) for number in range(4)]
+        DutyCycleScheduler(plans, slot=0.5, candidates=20).plan()
+        self.assertEqual(len({plan.phase for plan in plans}), 4)
+        for port in ('COM0', 'COM1'):
+            phases = sorted(plan.phase for plan in plans if plan.port == port)
+            self.assertGreaterEqual(phases[1] - phases[0], 4.5)
+            self.assertLessEqual(phases[1] - phases[0], 5.5)
+
+    def test_run_keeps_intervals(self):
+        """ Duty cycled sensors are woken, queried and put to sleep on time """
+        plans = [SensorPlan(self.sensor(0), interval=120, warmup=30, port='COM1'),
+                 SensorPlan(self.sensor(1), interval=120, warmup=30, port='COM1'),
+                 SensorPlan(self.sensor(2), interval=5, warmup=0, port='COM1')]
+        scheduler = DutyCycleScheduler(plans, slot=1.0, clock=self.clock)
+        received = []
+        scheduler.on_data = received.append
+        scheduler.run(duration=600, sleep=self.clock.sleep)
+
+        self.assertTrue(plans[0].duty_cycled)
+        self.assertFalse(plans[2].duty_cycled)
+        self.assertNotEqual(plans[0].phase, plans[1].phase)
+        for plan in plans:
+            self.assertEqual(plan.sensor.serial.report_mode, ReportMode.REPORT_QUERY_MODE)
+            self.assertEqual(plan.report()['achieved_interval'], plan.interval)
+            self.assertEqual(plan.data, {'PM2.5': 3.4, 'PM10': 4.0})
+        self.assertEqual(plans[0].sensor.serial.working_mode, WorkingMode.SLEEP_MODE)
+        self.assertEqual(plans[2].sensor.serial.working_mode, WorkingMode.WORK_MODE)
+
+        report = scheduler.report()
+        self.assertEqual(report['max_drift'], 0.0)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['samples'], len(received))
+        self.assertEqual(report['sensors']['0100']['samples'], 5)
+
+    def test_drift_is_reported(self):
+        """ Late commands are measured, later commands stay on the plan """
+        plan = SensorPlan(self.sensor(0), interval=10, warmup=0)
+        scheduler = DutyCycleScheduler([plan], clock=self.clock)
+        scheduler.setup()
+        self.clock.now = 13.0
+        self.assertEqual(scheduler.run_pending(), 2)
+        self.assertEqual(plan.drift_max, 13.0)
+        self.assertEqual(scheduler.next_time(), 20.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
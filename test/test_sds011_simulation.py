@@ -55,6 +55,16 @@ class TestSDS011Simulation(unittest.TestCase):
             self.sensor.read_and_decode_data()
             self.sensor.print_data()
 
+    def test_read_mapped_sample_data(self):
+        """ Read mapped sample data in slices with wrap around """
+        self.sensor_simulation.read_sample_data_sds011()
+        sample = self.sensor_simulation.path_to_sample_binary.read_bytes()
+        self.assertEqual(self.sensor_simulation.read(len(sample) - 5), sample[:-5])
+        self.assertEqual(self.sensor_simulation.read(len(sample) * 2 + 10),
+                         sample[-5:] + sample * 2 + sample[:5])
+        self.sensor_simulation.close()
+        self.assertIsNone(self.sensor_simulation.mapped_data)
+
     def test_print_data(self):
         """ Test print of measurement values """
         self.sensor_simulation.read_sample_data_sds011()
@@ -197,6 +207,18 @@ class TestSDS011Simulation(unittest.TestCase):
                          bytes(self.sensor_simulation.measurement_data))
         self.assertTrue(self.sensor.reply_message_valid())
 
+    def test_command_cache(self):
+        """ Test command frames are taken from the cache """
+        self.sensor.query_data()
+        first_command = self.sensor.last_command
+        self.sensor.query_data()
+        self.assertIs(self.sensor.last_command, first_command)
+        self.sensor.set_working_period(7, device_id=[10, 11])
+        self.assertIn((Command.WORKING_PERIOD, (Modifier.SET.value, 7), (10, 11)),
+                      SDS011.command_cache)
+        with self.assertRaises(AssertionError):
+            SDS011.command_frame(Command.QUERY_DATA, [0]*13)
+
     def __check_working_period_command(self):
         """ Check working period command"""
         self.assertEqual(self.sensor.last_command[2], Command.WORKING_PERIOD.value)
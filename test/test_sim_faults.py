@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+""" Test fault injection of the simulation """
+
+import time
+import unittest
+
+from pysds011.metrics import Metrics
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_faults import FaultInjector
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestFaultInjector(unittest.TestCase):
+    """ Tests FaultInjector with SDS011 and SimulationSDS011 """
+
+    def setUp(self):
+        self.sensor_simulation = SimulationSDS011()
+        self.metrics = Metrics()
+        self.sensor = SDS011(self.sensor_simulation, metrics=self.metrics, timeout=0.5)
+
+    def tearDown(self):
+        self.sensor_simulation.close()
+
+    def test_seeded_faults(self):
+        """ Same seed gives the same faults, counters match the stream """
+        data = bytes(range(256)) * 40
+        outputs = []
+        for _ in range(2):
+            faults = FaultInjector(seed=5, bit_flip_rate=0.01, drop_rate=0.01,
+                                   duplicate_rate=0.01, garbage_rate=0.001)
+            outputs.append(b''.join(faults.corrupt(data[i:i + 100])
+                                    for i in range(0, len(data), 100)))
+        self.assertEqual(outputs[0], outputs[1])
+        stats = faults.stats()
+        self.assertTrue(all(stats[name] for name in ('bit_flips', 'dropped_bytes',
+                                                     'duplicated_bytes', 'garbage_bytes')))
+        self.assertEqual(len(outputs[0]), len(data) - stats['dropped_bytes'] +
+                         stats['duplicated_bytes'] + stats['garbage_bytes'])
+        self.assertEqual(FaultInjector(seed=1).corrupt(data), data)
+
+    def test_read_recovers(self):
+        """ Parser resyncs on noisy sample data, only valid frames are decoded """
+        self.sensor_simulation.read_sample_data_sds011()
+        faults = FaultInjector(seed=3, bit_flip_rate=0.002, drop_rate=0.002,
+                               duplicate_rate=0.002, garbage_rate=0.002)
+        self.sensor_simulation.use_faults(faults)
+        for _ in range(2000):
+            self.sensor.read_and_decode_data()
+            self.assertTrue(self.sensor.reply_message_valid())
+        self.assertGreater(self.metrics.bytes_skipped, 0)
+        self.assertGreater(self.metrics.invalid_frames, 0)
+
+    def test_missing_reply(self):
+        """ Dropped command replies end in a timeout """
+        self.sensor_simulation.use_faults(FaultInjector(seed=1, reply_drop_rate=1.0))
+        with self.assertRaises(TimeoutError):
+            self.sensor.get_working_period()
+        self.assertEqual(self.metrics.timeouts, 1)
+        # data frames are not withheld
+        self.sensor.query_data()
+
+    def test_delayed_reply(self):
+        """ Delayed command replies arrive after the delay """
+        faults = FaultInjector(seed=1, reply_delay_rate=1.0, reply_delay=(0.05, 0.05))
+        self.sensor_simulation.use_faults(faults)
+        start = time.monotonic()
+        self.sensor.get_firmware_version()
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(self.sensor.firmware, {'year': 15, 'month': 7, 'day': 10})
+        self.assertEqual(faults.delayed_replies, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+""" Test synthetic frame generator """
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pysds011 import codec
+from pysds011.parser import FrameParser
+from pysds011.sds011 import SDS011
+from pysds011.simulation import sim_generator
+from pysds011.simulation.sim_generator import FrameGenerator, Waveform
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+
+
+class TestFrameGenerator(unittest.TestCase):
+    """ Tests FrameGenerator and the generator mode of SimulationSDS011 """
+
+    def generator(self, seed: int = 1) -> FrameGenerator:
+        """ Generator for three devices with a step event """
+        waveforms = [Waveform(base=20, amplitude=5, period=100, noise=0.5,
+                              steps=[(10, 5, 300)]),
+                     Waveform(base=900, amplitude=200, period=100, noise=0)]
+        return FrameGenerator([[0, 1], [0, 2], [0, 3]], waveforms, interval=1.0, seed=seed)
+
+    def check_stream(self, data: bytes) -> None:
+        """ All frames are valid, interleaved by device and follow the waveforms """
+        frames = [bytes(frame) for frame in FrameParser(len(data)).parse(data)]
+        self.assertEqual(len(frames) * codec.REPLY_LENGTH, len(data))
+        for number, frame in enumerate(frames):
+            self.assertTrue(codec.reply_valid(frame))
+            self.assertEqual(frame[6:8], bytes([0, number % 3 + 1]))
+        pm25 = [codec.unpack_pm(frame)[0] for frame in frames]
+        # step event of the first device at 10..15 s
+        self.assertTrue(all(3000 < value < 3400 for value in pm25[30:45:3]))
+        self.assertTrue(all(100 < value < 300 for value in pm25[45:300:3]))
+        # second device waveform with the same shape is clipped at 999.9
+        self.assertEqual(max(pm25[1::3]), sim_generator.MAX_VALUE)
+
+    def test_numpy_stream(self):
+        """ Vectorized frames are valid and reproducible, chunking does not matter """
+        if sim_generator.np is None:
+            self.skipTest('numpy not installed')
+        data = self.generator().generate(600)
+        self.check_stream(data)
+        self.assertEqual(data, self.generator().generate(600))
+        chunked = self.generator(seed=None)
+        self.assertEqual(len(b''.join(chunked.chunks(600, chunk_frames=7))), 6000)
+        self.assertEqual(chunked.frame_number, 600)
+
+    def test_pure_python_stream(self):
+        """ Without numpy frames are built one by one """
+        with mock.patch.object(sim_generator, 'np', None):
+            self.check_stream(self.generator().generate(600))
+
+    def test_write_file(self):
+        """ Capture file holds the generated frames """
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'capture.bin'
+            self.assertEqual(self.generator().write_file(path, 100, chunk_frames=33), 1000)
+            self.check_stream(path.read_bytes() + self.generator().generate(500)[1000:])
+
+    def test_simulation_read(self):
+        """ SDS011 reads generated frames through SimulationSDS011.read() """
+        simulation = SimulationSDS011()
+        sensor = SDS011(simulation)
+        simulation.use_generator(self.generator(), chunk_frames=64)
+        device_ids = []
+        for _ in range(300):
+            sensor.read_and_decode_data()
+            device_ids.append(sensor.last_reply[7])
+        self.assertEqual(device_ids, [1, 2, 3] * 100)
+        self.assertEqual(sensor.reader.parser.skipped_bytes, 0)
+        # commands are answered in between
+        sensor.get_firmware_version()
+        self.assertEqual(sensor.firmware, {'year': 15, 'month': 7, 'day': 10})
+        sensor.read_and_decode_data()
+        self.assertEqual(sensor.last_reply[1], codec.DATA)
+        simulation.read_sample_data_sds011()
+        self.assertIsNone(simulation.generator)
+        simulation.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+""" Test streaming statistics """
+
+import random
+import statistics
+import unittest
+
+from pysds011 import codec
+from pysds011.sds011 import SDS011
+from pysds011.simulation.sim_sds011 import SimulationSDS011
+from pysds011.stream_stats import EWMA, QuantileSketch, RunningStats, StreamStatistics
+
+
+class TestStreamStatistics(unittest.TestCase):
+    """ Tests StreamStatistics and its parts """
+
+    def setUp(self):
+        self.random = random.Random(7)
+        self.values = [self.random.randint(0, 3000) for _ in range(5000)]
+
+    def test_running_stats_merge(self):
+        """ Merged statistics equal statistics of all values """
+        first, second = RunningStats(), RunningStats()
+        for value in self.values[:1000]:
+            first.add(value)
+        for value in self.values[1000:]:
+            second.add(value)
+        first.merge(second)
+        self.assertEqual(first.count, len(self.values))
+        self.assertAlmostEqual(first.mean, statistics.mean(self.values))
+        self.assertAlmostEqual(first.variance, statistics.variance(self.values), places=3)
+        self.assertEqual((first.min, first.max), (min(self.values), max(self.values)))
+
+    def test_ewma(self):
+        """ First value initializes, later values are weighted by alpha """
+        ewma = EWMA(0.5)
+        ewma.add(10)
+        ewma.add(20)
+        self.assertEqual(ewma.value, 15.0)
+        self.assertAlmostEqual(EWMA.from_halflife(1).alpha, 0.5)
+
+    def test_sketch_accuracy(self):
+        """ Quantiles are within the relative accuracy, merge and serialization are lossless """
+        sketch, other = QuantileSketch(0.01), QuantileSketch(0.01)
+        for value in self.values[:2500]:
+            sketch.add(value)
+        for value in self.values[2500:]:
+            other.add(value)
+        sketch.merge(QuantileSketch.from_bytes(other.to_bytes()))
+        ordered = sorted(self.values)
+        for q in (0.0, 0.5, 0.95, 0.99, 1.0):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - exact), 0.01 * exact + 1e-9)
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+        with self.assertRaises(ValueError):
+            sketch.merge(QuantileSketch(0.02))
+
+    def test_per_device_summary(self):
+        """ Frames are told apart by device id, merged across instances """
+        day1, day2 = StreamStatistics(), StreamStatistics()
+        for value in self.values:
+            day1.add_frame(codec.pack_data(value, 2 * value, [1, 2]))
+            day2.add('0304', 100, 200)
+        day1.merge(day2)
+        summary = day1.summary()
+        self.assertEqual(set(summary), {'0102', '0304'})
+        self.assertEqual(summary['0304']['PM2.5']['p99'], 10.0)
+        self.assertEqual(summary['0304']['PM10']['stddev'], 0.0)
+        pm25 = summary['0102']['PM2.5']
+        self.assertEqual(pm25['count'], len(self.values))
+        self.assertAlmostEqual(pm25['mean'], statistics.mean(self.values) / 10)
+        self.assertAlmostEqual(pm25['p50'], statistics.median(self.values) / 10,
+                               delta=pm25['p50'] * 0.02)
+
+    def test_add_sensor(self):
+        """ Decoded frames of a sensor are added """
+        simulation = SimulationSDS011()
+        sensor = SDS011(simulation)
+        stats = StreamStatistics()
+        stats.add_sensor(sensor)
+        self.assertEqual(stats.devices, {})
+        sensor.query_data()
+        stats.add_sensor(sensor)
+        self.assertEqual(stats.summary()['0A0B']['PM10']['max'], 4.0)
+        simulation.close()
+
+
+if __name__ == '__main__':
+    unittest.main()